@@ -0,0 +1 @@
+"""Shared helpers for the ACLED Conflict Explorer pages."""
@@ -0,0 +1,69 @@
+"""Point-in-polygon aggregation of events over admin boundaries.
+
+The expensive part, finding the polygon that contains each event, only
+changes when the events or the boundaries change. It is computed once per
+event frame and boundary set, then memoized for as long as the frame is
+alive, so reruns only pay for a ``bincount``.
+"""
+import numpy as np
+import pandas as pd
+import shapely
+
+from acled.filters import view_source
+from acled.memo import frame_memo
+
+
+def assign_points(lon, lat, polygons):
+    """Return the position in ``polygons`` of the polygon containing each point.
+
+    The points go into an ``STRtree`` and each polygon queries it with
+    ``contains``, so shapely prepares every polygon once and only tests the
+    points inside its bounding box. Points outside every polygon get ``-1``;
+    a point on a shared border goes to the first polygon containing it.
+    """
+    lon = np.asarray(lon, dtype='float64')
+    lat = np.asarray(lat, dtype='float64')
+    tree = shapely.STRtree(shapely.points(lon, lat))
+    polygon_idx, point_idx = tree.query(np.asarray(polygons), predicate='contains')
+    assignment = np.full(len(lon), -1, dtype='int32')
+    # Write in reverse so the first polygon wins for border points.
+    assignment[point_idx[::-1]] = polygon_idx[::-1]
+    return assignment
+
+
+def cached_assignment(gdf, polygons, key):
+    """``assign_points`` memoized on the identity of ``gdf`` and ``key``."""
+    def compute():
+        assignment = assign_points(gdf['longitude'], gdf['latitude'], polygons.geometry.values)
+        assignment.setflags(write=False)
+        return assignment
+
+    # A filtered view reuses the full frame's assignment instead of querying
+    # the tree again.
+    source = view_source(gdf)
+    if source is not None:
+        full_frame, positions = source
+        return frame_memo(
+            gdf, ("assignment", key),
+            lambda: cached_assignment(full_frame, polygons, key)[positions],
+        )
+    return frame_memo(gdf, ("assignment", key), compute)
+
+
+def aggregate_by_polygon(gdf, polygons, key, name_column='shapeName'):
+    """Sum fatalities and count events per polygon in a single pass.
+
+    ``key`` identifies the boundary set, e.g. ``("UKR", "ADM1")``. Returns one
+    row per polygon, in the order of ``polygons``, with ``name_column``,
+    ``fatalities`` and ``events``.
+    """
+    assignment = cached_assignment(gdf, polygons, key)
+    inside = assignment >= 0
+    n = len(polygons)
+    return pd.DataFrame({
+        name_column: polygons[name_column].to_numpy(),
+        'fatalities': np.bincount(
+            assignment[inside], weights=gdf['fatalities'].to_numpy()[inside], minlength=n
+        ).astype('int64'),
+        'events': np.bincount(assignment[inside], minlength=n),
+    })
@@ -0,0 +1,170 @@
+"""geoBoundaries admin polygons with memory and disk caching.
+
+Boundaries are keyed by ``(iso3, level)``. On first download every tolerance
+in ``TOLERANCES`` is precomputed and written to the cache directory as
+GeoParquet, so later reads (in this process or after a restart) never touch
+geoBoundaries. ``prefetch`` starts a download in the background so the admin
+page usually finds the boundaries ready. ``get_region_boundaries`` stitches
+the polygons of several countries together and keeps the result next to the
+per-country entries.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from acled.client import TIMEOUT, get_session
+from acled.store import CACHE_DIR
+
+GEOBOUNDARIES_URL = "https://www.geoboundaries.org/api/current/gbOpen/{iso3}/{level}/"
+BOUNDARY_DIR = os.path.join(CACHE_DIR, "boundaries")
+
+# Simplification tolerances in degrees; 0 keeps the geoBoundaries geometry.
+TOLERANCES = (0, 0.002, 0.01, 0.05)
+MAX_MEMORY_ENTRIES = 16
+
+_memory = OrderedDict()
+_in_flight = {}
+_lock = threading.Lock()
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="boundary-prefetch")
+
+
+def download_boundaries(iso3, level="ADM1"):
+    """Fetch the simplified geoBoundaries GeoJSON for ``iso3`` at ``level``."""
+    import geopandas as gpd  # deferred: boundaries load in the background
+
+    # Get the metadata from the GeoBoundaries API
+    response = get_session().get(GEOBOUNDARIES_URL.format(iso3=iso3, level=level), timeout=TIMEOUT)
+    if response.status_code != 200:
+        raise ValueError(f"Could not fetch data for {iso3}, status code: {response.status_code}")
+
+    # Extract the simplified GeoJSON URL
+    simplified_url = response.json().get("simplifiedGeometryGeoJSON")
+    if not simplified_url:
+        raise ValueError("No simplifiedGeometryGeoJSON found in API response.")
+
+    return gpd.read_file(simplified_url)
+
+
+def pick_tolerance(zoom=None, n_vertices=None):
+    """Choose the coarsest tolerance that stays invisible at ``zoom``.
+
+    A tolerance below half a 256 px web-mercator tile pixel can't be seen.
+    Without a zoom, the vertex count decides: big layers get coarser
+    geometry so the page payload stays small.
+    """
+    if zoom is not None:
+        half_pixel = 360 / (256 * 2 ** zoom) / 2
+        return max(t for t in TOLERANCES if t <= half_pixel)
+    if n_vertices is None or n_vertices < 50_000:
+        return TOLERANCES[0]
+    if n_vertices < 250_000:
+        return TOLERANCES[1]
+    return TOLERANCES[2]
+
+
+def _disk_path(iso3, level, tolerance):
+    return os.path.join(BOUNDARY_DIR, f"{iso3}_{level}_{tolerance:g}.parquet")
+
+
+def _load_levels(iso3, level):
+    """Read all tolerances from disk, downloading and precomputing them if needed."""
+    import geopandas as gpd
+
+    paths = {t: _disk_path(iso3, level, t) for t in TOLERANCES}
+    if all(os.path.exists(p) for p in paths.values()):
+        return {t: gpd.read_parquet(p) for t, p in paths.items()}
+
+    source = download_boundaries(iso3, level)
+    levels = {
+        t: source if t == 0 else source.assign(geometry=source.geometry.simplify(t, preserve_topology=True))
+        for t in TOLERANCES
+    }
+    os.makedirs(BOUNDARY_DIR, exist_ok=True)
+    for t, gdf in levels.items():
+        gdf.to_parquet(paths[t], index=False)
+    return levels
+
+
+def _ensure_levels(iso3, level):
+    key = (iso3, level)
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+        event = _in_flight.get(key)
+        owner = event is None
+        if owner:
+            event = _in_flight[key] = threading.Event()
+
+    if not owner:
+        # Another thread (usually a prefetch) is loading the same key.
+        event.wait()
+        with _lock:
+            if key in _memory:
+                return _memory[key]
+        return _ensure_levels(iso3, level)
+
+    try:
+        levels = _load_levels(iso3, level)
+        with _lock:
+            _memory[key] = levels
+            while len(_memory) > MAX_MEMORY_ENTRIES:
+                _memory.popitem(last=False)
+        return levels
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+        event.set()
+
+
+def get_boundaries(iso3, level="ADM1", tolerance=0):
+    """Return the admin polygons of ``iso3`` simplified to ``tolerance``.
+
+    ``tolerance`` must be one of ``TOLERANCES``; use ``pick_tolerance`` to
+    choose it from a zoom level or vertex count.
+    """
+    return _ensure_levels(iso3, level)[tolerance]
+
+
+def get_region_boundaries(iso3s, level="ADM1", tolerance=0):
+    """Return the admin polygons of several countries as one frame.
+
+    Rows follow the order of ``iso3s``, then each country's own order. The
+    countries download in parallel the first time.
+    """
+    import pandas as pd
+
+    iso3s = tuple(iso3s)
+    if len(iso3s) == 1:
+        return get_boundaries(iso3s[0], level, tolerance)
+    key = ("+".join(iso3s), level)
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key][tolerance]
+
+    for iso3 in iso3s:
+        prefetch(iso3, level)
+    parts = [_ensure_levels(iso3, level) for iso3 in iso3s]
+    levels = {t: pd.concat([part[t] for part in parts], ignore_index=True) for t in TOLERANCES}
+    with _lock:
+        _memory[key] = levels
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return levels[tolerance]
+
+
+def prefetch(iso3, level="ADM1"):
+    """Start loading ``(iso3, level)`` in the background; returns immediately."""
+    with _lock:
+        if (iso3, level) in _memory or (iso3, level) in _in_flight:
+            return
+
+    def load():
+        try:
+            _ensure_levels(iso3, level)
+        except Exception as e:
+            print(f"Boundary prefetch failed for {iso3} {level}: {e}")
+
+    _prefetch_pool.submit(load)
@@ -0,0 +1,151 @@
+"""Process-wide ACLED HTTP client: pooled session and OAuth token manager.
+
+Every page, every Streamlit session and every fetch thread in the process
+shares one ``requests.Session`` (keep-alive, gzip, connection retries) and
+one token per account. Tokens are refreshed shortly before the
+``expires_in`` ACLED reports, not on a fixed schedule.
+
+Set ``ACLED_BASE_URL`` to point the app at another server, e.g. the mock in
+``tests/mock_acled.py``, so the whole pipeline can be exercised offline.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ACLED_BASE_URL = os.getenv("ACLED_BASE_URL", "https://acleddata.com").rstrip("/")
+
+# Process-wide cap on in-flight ACLED requests, shared by every session and
+# shard, so parallel fetches stay inside the API rate limits.
+MAX_CONCURRENCY = int(os.getenv("ACLED_MAX_CONCURRENCY", "4"))
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+TIMEOUT = (10, 120)  # (connect, read) seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+TOKEN_REFRESH_MARGIN = 300  # refresh this many seconds before expiry
+DEFAULT_TOKEN_LIFETIME = 3600
+
+_session = None
+_session_lock = threading.Lock()
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_session():
+    """The pooled ``requests.Session`` shared by the whole process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Status-code retries are done by get_with_retry, which also
+            # honours Retry-After; urllib3 only retries broken connections.
+            adapter = HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=max(MAX_CONCURRENCY, 8),
+                max_retries=Retry(total=3, connect=3, read=2, status=0, backoff_factor=0.5),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+            _session = session
+        return _session
+
+
+def get_with_retry(http, url, **kwargs):
+    """GET ``url``, backing off exponentially on 429 and 5xx responses.
+
+    Every attempt holds one of the ``MAX_CONCURRENCY`` request slots.
+    ``Retry-After`` is honoured when the server sends it.
+    """
+    kwargs.setdefault("timeout", TIMEOUT)
+    for attempt in range(MAX_RETRIES + 1):
+        with _request_slots:
+            response = http.get(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+        retry_after = response.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else BACKOFF_SECONDS * 2 ** attempt
+        time.sleep(delay)
+    return response
+
+
+class TokenManager:
+    """Thread-safe holder of one account's OAuth2 Bearer token."""
+
+    def __init__(self, email, password, session=None, base_url=ACLED_BASE_URL):
+        self.email = email
+        self.password = password
+        self.session = session or get_session()
+        self.base_url = base_url
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _request_token(self):
+        response = self.session.post(
+            f"{self.base_url}/oauth/token",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={
+                "username": self.email,
+                "password": self.password,
+                "grant_type": "password",
+                "client_id": "acled"
+            },
+            timeout=TIMEOUT,
+        )
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Failed to get token: {response.status_code} {response.text}")
+
+    def token(self):
+        """Return a valid token, refreshing it if it is about to expire."""
+        with self._lock:
+            if self._token is None or time.time() >= self._expires_at - TOKEN_REFRESH_MARGIN:
+                payload = self._request_token()
+                self._token = payload["access_token"]
+                self._expires_at = time.time() + float(payload.get("expires_in", DEFAULT_TOKEN_LIFETIME))
+            return self._token
+
+    def invalidate(self):
+        """Drop the current token, e.g. after the API rejected it."""
+        with self._lock:
+            self._token = None
+
+
+class AcledClient:
+    def __init__(self, email, password, base_url=ACLED_BASE_URL, session=None):
+        self.base_url = base_url
+        self.session = session or get_session()
+        self.tokens = TokenManager(email, password, self.session, base_url)
+
+    def get(self, path, params):
+        """GET an API path with the Bearer token, retrying once on a rejected token."""
+        for attempt in range(2):
+            response = get_with_retry(
+                self.session,
+                f"{self.base_url}{path}",
+                params=params,
+                headers={
+                    "Authorization": f"Bearer {self.tokens.token()}",
+                    "Content-Type": "application/json"
+                }
+            )
+            if response.status_code != 401 or attempt:
+                return response
+            self.tokens.invalidate()
+        return response
+
+
+def get_client(email, password):
+    """The shared ``AcledClient`` for an account, created on first use."""
+    with _clients_lock:
+        client = _clients.get(email)
+        if client is None or client.tokens.password != password:
+            client = _clients[email] = AcledClient(email, password)
+        return client
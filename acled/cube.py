@@ -0,0 +1,103 @@
+"""Precomputed time × region aggregates of the loaded events.
+
+A ``TimeCube`` holds fatalities and event counts per date bucket (day, week,
+month) × country × admin1 × admin2. It is built once when data is fetched; charts read
+slices of it instead of regrouping the event frame on every rerun. Cubes are
+never modified in place: ``append`` returns a new cube, so one cube can be
+shared by every page and session that loaded the same data. A regional
+cube is ``combine``d from the cubes of its countries.
+"""
+from types import MappingProxyType
+
+import pandas as pd
+
+from acled.memo import frame_memo
+
+BUCKETS = ("day", "week", "month")
+REGIONS = ("country", "admin1", "admin2")
+METRICS = ("fatalities", "events")
+
+_PERIODS = {"week": "W-SUN", "month": "M"}  # weeks start on Monday
+
+
+def _bucket(dates, bucket):
+    if bucket == "day":
+        return dates.dt.normalize()
+    return dates.dt.to_period(_PERIODS[bucket]).dt.start_time
+
+
+def _daily(gdf):
+    """Aggregate raw events to the (day, country, admin1, admin2) grain."""
+    keys = pd.DataFrame({
+        'bucket': _bucket(pd.to_datetime(gdf['event_date']), "day"),
+        'country': gdf['country'].astype('string').fillna(''),
+        'admin1': gdf['admin1'].astype('string').fillna(''),
+        'admin2': gdf['admin2'].astype('string').fillna(''),
+        'fatalities': gdf['fatalities'].astype('int64'),
+    })
+    return keys.groupby(['bucket', *REGIONS]).agg(
+        fatalities=('fatalities', 'sum'),
+        events=('fatalities', 'size'),
+    )
+
+
+def _roll_up(daily, bucket):
+    """Re-bucket a daily table to ``bucket`` without touching raw events."""
+    if bucket == "day":
+        return daily
+    frame = daily.reset_index()
+    frame['bucket'] = _bucket(frame['bucket'], bucket)
+    return frame.groupby(['bucket', *REGIONS])[list(METRICS)].sum()
+
+
+class TimeCube:
+    def __init__(self, tables):
+        self._tables = MappingProxyType(dict(tables))
+
+    @classmethod
+    def build(cls, gdf):
+        """Build every bucket level from an event frame."""
+        daily = _daily(gdf)
+        return cls({bucket: _roll_up(daily, bucket) for bucket in BUCKETS})
+
+    @classmethod
+    def combine(cls, cubes):
+        """Return one cube counting the events of all ``cubes``.
+
+        Used for regions: each country's cube is already built, so only the
+        aggregated cells are added up, never the raw events.
+        """
+        cubes = list(cubes)
+        if len(cubes) == 1:
+            return cubes[0]
+        return cls({
+            bucket: pd.concat([cube._tables[bucket] for cube in cubes])
+            .groupby(level=['bucket', *REGIONS])[list(METRICS)].sum()
+            for bucket in BUCKETS
+        })
+
+    def append(self, rows):
+        """Return a new cube that also counts ``rows``.
+
+        Only the new rows are aggregated; they are then added cell-wise to
+        each existing level.
+        """
+        daily = _daily(rows)
+        return TimeCube({
+            bucket: self._tables[bucket].add(_roll_up(daily, bucket), fill_value=0).astype('int64')
+            for bucket in BUCKETS
+        })
+
+    def series(self, bucket="month", region="admin1", metric="fatalities"):
+        """Return a wide frame: one row per date bucket, one column per region."""
+        table = self._tables[bucket][metric].groupby(level=['bucket', region]).sum()
+        return table.unstack(region, fill_value=0)
+
+    def totals(self, bucket="month", metric="fatalities"):
+        """Return ``metric`` summed over all regions for each date bucket."""
+        return self._tables[bucket][metric].groupby(level='bucket').sum()
+
+
+def cube_for(frame):
+    """``TimeCube.build(frame)`` memoized on the identity of ``frame``."""
+    return frame_memo(frame, ("time_cube",), lambda: TimeCube.build(frame))
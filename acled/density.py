@@ -0,0 +1,106 @@
+"""Server-side event density for the density page.
+
+Events are binned into a 2-D histogram over their extent, weighted by
+fatalities or counted, and optionally smoothed with a Gaussian kernel (a
+grid KDE). The page then receives either one PNG overlay or one heatmap
+point per occupied cell, so the payload depends on the grid size and not on
+the number of events. Grids are memoized per event frame and parameters.
+"""
+import folium
+import numpy as np
+import pandas as pd
+
+from acled.memo import frame_memo
+
+GRID_CELLS = 256  # cells along the longer side of the bounds
+SMOOTHING_CELLS = 1.5  # Gaussian sigma, in cells; 0 disables smoothing
+
+
+def _gaussian_kernel(sigma):
+    radius = max(1, int(round(3 * sigma)))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def smooth(grid, sigma=SMOOTHING_CELLS):
+    """Separable Gaussian blur of a 2-D grid (mass-preserving away from edges)."""
+    if sigma <= 0:
+        return grid
+    kernel = _gaussian_kernel(sigma)
+    blurred = np.apply_along_axis(np.convolve, 0, grid, kernel, mode='same')
+    return np.apply_along_axis(np.convolve, 1, blurred, kernel, mode='same')
+
+
+def density_grid(lon, lat, bounds, weights=None, cells=GRID_CELLS, sigma=SMOOTHING_CELLS):
+    """Bin points into a grid over ``bounds`` = ``(minx, miny, maxx, maxy)``.
+
+    Cells are square in degrees; the longer side of the bounds gets ``cells``
+    cells. Returns ``(grid, (minx, miny, maxx, maxy))`` where ``grid[row, col]``
+    has row 0 at the south edge and the bounds are snapped to whole cells.
+    """
+    minx, miny, maxx, maxy = bounds
+    size = max(maxx - minx, maxy - miny, 1e-6) / cells
+    nx = max(1, int(np.ceil((maxx - minx) / size)))
+    ny = max(1, int(np.ceil((maxy - miny) / size)))
+    edges_x = minx + size * np.arange(nx + 1)
+    edges_y = miny + size * np.arange(ny + 1)
+    grid, _, _ = np.histogram2d(lat, lon, bins=[edges_y, edges_x], weights=weights)
+    return smooth(grid, sigma), (edges_x[0], edges_y[0], edges_x[-1], edges_y[-1])
+
+
+def event_density(gdf, bounds, weight="fatalities", cells=GRID_CELLS, sigma=SMOOTHING_CELLS):
+    """``density_grid`` of an event frame, memoized per frame and parameters.
+
+    ``weight`` is ``"fatalities"`` or ``"events"`` (plain counts).
+    """
+    def compute():
+        weights = gdf['fatalities'].to_numpy(dtype='float64') if weight == "fatalities" else None
+        grid, grid_bounds = density_grid(
+            gdf['longitude'].to_numpy(dtype='float64'),
+            gdf['latitude'].to_numpy(dtype='float64'),
+            bounds, weights=weights, cells=cells, sigma=sigma,
+        )
+        grid.setflags(write=False)
+        return grid, grid_bounds
+
+    return frame_memo(gdf, ("density", tuple(bounds), weight, cells, sigma), compute)
+
+
+def to_rgba(grid, max_alpha=0.85):
+    """Map a density grid to a yellow→red RGBA image, north row first.
+
+    A log scale keeps isolated events visible next to dense hotspots; empty
+    cells are fully transparent.
+    """
+    top = np.log1p(grid.max()) or 1.0
+    v = np.log1p(grid) / top
+    rgba = np.zeros(grid.shape + (4,), dtype='float64')
+    rgba[..., 0] = 1.0
+    rgba[..., 1] = 1.0 - v
+    rgba[..., 3] = np.where(grid > 0, 0.15 + (max_alpha - 0.15) * v, 0.0)
+    return rgba[::-1]
+
+
+def add_density_overlay(m, grid, grid_bounds, name="Conflict density"):
+    """Add the grid to a folium/leafmap map as a single PNG overlay."""
+    minx, miny, maxx, maxy = grid_bounds
+    folium.raster_layers.ImageOverlay(
+        image=to_rgba(grid),
+        bounds=[[miny, minx], [maxy, maxx]],
+        mercator_project=True,
+        name=name,
+    ).add_to(m)
+
+
+def grid_points(grid, grid_bounds):
+    """Reduce a grid to one point per non-empty cell, at the cell centre."""
+    minx, miny, maxx, maxy = grid_bounds
+    rows, cols = np.nonzero(grid)
+    size_x = (maxx - minx) / grid.shape[1]
+    size_y = (maxy - miny) / grid.shape[0]
+    return pd.DataFrame({
+        'latitude': miny + (rows + 0.5) * size_y,
+        'longitude': minx + (cols + 0.5) * size_x,
+        'value': grid[rows, cols],
+    })
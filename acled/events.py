@@ -0,0 +1,36 @@
+"""Loading one country's events: the local store first, ACLED for the rest.
+
+Shared by the events page and the ``acled.warmup`` command, so a scheduled
+warm-up fills exactly the store partitions the page later reads.
+"""
+from acled.fetch import fetch_events, fetch_events_sharded
+from acled.instrument import stage
+from acled.store import load_events
+
+
+def load_country_events(store, client, iso, iso3, start_date, end_date, shard_by=None,
+                        on_progress=None, on_chunk=None):
+    """Return ``(df, CacheStats)`` for ``iso`` between two ``YYYY-MM-DD`` dates.
+
+    Months already in ``store`` are read from disk; missing or stale months
+    are fetched page by page, reporting the running row count to
+    ``on_progress`` and each converted page to ``on_chunk``. ``shard_by``
+    ("month" or "quarter") fetches them as parallel date shards. ``df`` is
+    ``None`` when there are no events.
+    """
+    def fetch_range(range_start, range_end):
+        # Rows and bytes are counted per page by acled.fetch.
+        with stage("acled_fetch", iso3=iso3, shard_by=shard_by or "none"):
+            if shard_by:
+                return fetch_events_sharded(
+                    {"iso": iso}, client, range_start, range_end, freq=shard_by,
+                    on_page=on_progress, on_chunk=on_chunk,
+                )
+            params = {
+                "iso": iso,
+                "event_date": f"{range_start}|{range_end}",
+                "event_date_where": "BETWEEN",
+            }
+            return fetch_events(params, client, on_page=on_progress, on_chunk=on_chunk)
+
+    return load_events(store, iso, start_date, end_date, fetch_range)
@@ -0,0 +1,108 @@
+"""Chunked export of an event frame to CSV, GeoParquet or GeoPackage.
+
+Each format is written ``CHUNK_ROWS`` rows at a time into a temporary
+file, so an export only ever converts one chunk (strings, WKB geometries)
+next to the loaded frame instead of a second copy of all of it.
+``export_events`` returns the finished file opened for reading; the file is
+deleted once it is closed.
+"""
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "GeoPackage": ("gpkg", "application/geopackage+sqlite3"),
+}
+
+
+def _geoparquet_metadata(crs):
+    column = {"encoding": "WKB", "geometry_types": ["Point"]}
+    if crs is not None:
+        column["crs"] = crs.to_json_dict()
+    return {"version": "1.0.0", "primary_column": "geometry", "columns": {"geometry": column}}
+
+
+def _chunks(frame, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(frame), chunk_rows):
+        yield start == 0, frame.iloc[start:start + chunk_rows]
+
+
+def _attributes(chunk):
+    return chunk.drop(columns='geometry', errors='ignore')
+
+
+def write_csv(frame, f, chunk_rows=CHUNK_ROWS):
+    """Write ``frame`` without its geometry (``latitude``/``longitude`` stay) as CSV."""
+    for first, chunk in _chunks(frame, chunk_rows):
+        f.write(_attributes(chunk).to_csv(index=False, header=first, date_format="%Y-%m-%d").encode())
+
+
+def write_parquet(frame, f, chunk_rows=CHUNK_ROWS):
+    """Write ``frame`` as GeoParquet, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import shapely
+
+    writer = None
+    try:
+        for _, chunk in _chunks(frame, chunk_rows):
+            table = pa.Table.from_pandas(_attributes(chunk), preserve_index=False)
+            if 'geometry' in chunk:
+                table = table.append_column(
+                    "geometry", pa.array(shapely.to_wkb(chunk.geometry.values), type=pa.binary())
+                )
+            if writer is None:
+                schema = table.schema
+                if 'geometry' in chunk:
+                    geo = json.dumps(_geoparquet_metadata(frame.crs)).encode()
+                    schema = schema.with_metadata({**(schema.metadata or {}), b"geo": geo})
+                writer = pq.ParquetWriter(f, schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_geopackage(frame, path, layer="events", chunk_rows=CHUNK_ROWS):
+    """Write ``frame`` to a GeoPackage layer, appending chunk by chunk."""
+    import pyogrio
+
+    for first, chunk in _chunks(frame, chunk_rows):
+        # GDAL has no categorical type; only this chunk is converted.
+        chunk = chunk.assign(**{
+            column: chunk[column].astype(str)
+            for column in chunk.columns if isinstance(chunk[column].dtype, pd.CategoricalDtype)
+        })
+        pyogrio.write_dataframe(chunk, path, layer=layer, driver="GPKG", append=not first)
+
+
+def export_events(frame, fmt):
+    """Write ``frame`` in ``fmt`` (a key of ``FORMATS``); returns the file opened for reading.
+
+    The file is a plain ``io.BufferedReader``, which ``st.download_button``
+    accepts as deferred data.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    # A named file, because SQLite needs one; it is unlinked as soon as it is reopened.
+    fd, path = tempfile.mkstemp(suffix=f".{FORMATS[fmt][0]}")
+    os.close(fd)
+    try:
+        if fmt == "GeoPackage":
+            os.remove(path)  # GDAL creates the file itself
+            write_geopackage(frame, path)
+        else:
+            with open(path, "wb") as f:
+                (write_csv if fmt == "CSV" else write_parquet)(frame, f)
+        return open(path, "rb")
+    finally:
+        try:
+            os.remove(path)
+        except OSError:  # Windows keeps open files
+            pass
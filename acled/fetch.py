@@ -0,0 +1,146 @@
+"""Paginated, streaming reads from the ACLED ``acled/read`` endpoint.
+
+All requests go through an ``acled.client.AcledClient``, which owns the
+pooled session, the token and the retry and concurrency policy.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from acled.client import MAX_CONCURRENCY
+from acled.frame import FIELDS, records_to_frame
+from acled.instrument import count
+
+PAGE_SIZE = int(os.getenv("ACLED_PAGE_SIZE", "5000"))
+
+SHARD_FREQUENCIES = {"month": "MS", "quarter": "QS"}
+
+
+def iter_pages(params, client, page_size=PAGE_SIZE):
+    """Yield the records of each ``acled/read`` page until a short page arrives."""
+    page = 1
+    while True:
+        response = client.get(
+            "/api/acled/read",
+            {
+                **params,
+                "fields": "|".join(FIELDS),
+                "limit": page_size,
+                "page": page,
+                "_format": "json",
+            }
+        )
+
+        if response.status_code != 200:
+            raise Exception(f"ACLED API request failed: {response.status_code}")
+
+        data = response.json()
+        if 'data' not in data:
+            raise Exception("No 'data' key in ACLED API response.")
+
+        records = data['data']
+        # Attributed to whichever pipeline stage is fetching.
+        count(rows=len(records), nbytes=len(response.content))
+        if records:
+            yield records
+        if len(records) < page_size:
+            return
+        page += 1
+
+
+def fetch_events(params, client, on_page=None, page_size=PAGE_SIZE, on_chunk=None):
+    """Page through ``acled/read`` and return all events as one DataFrame.
+
+    Each page is parsed and converted as soon as it arrives, so only one raw
+    JSON page is held in memory at a time. ``on_page`` is called with the
+    running row count after every page and ``on_chunk`` with the converted
+    page itself. Returns ``None`` when nothing matched.
+    """
+    chunks = []
+    n_rows = 0
+    for records in iter_pages(params, client, page_size=page_size):
+        chunk = records_to_frame(records)
+        chunks.append(chunk)
+        n_rows += len(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        if on_page is not None:
+            on_page(n_rows)
+
+    if not chunks:
+        return None
+    return pd.concat(chunks, ignore_index=True)
+
+
+def shard_period(start_date, end_date, freq="month"):
+    """Split an inclusive date range into consecutive month or quarter shards.
+
+    Returns a list of ``(start, end)`` ISO date strings covering the range
+    exactly, with the first and last shard clipped to the requested dates.
+    """
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    bounds = pd.date_range(start, end, freq=SHARD_FREQUENCIES[freq])
+    starts = [start] + [b for b in bounds if b > start]
+    ends = [s - pd.Timedelta(days=1) for s in starts[1:]] + [end]
+    return [(s.strftime("%Y-%m-%d"), e.strftime("%Y-%m-%d")) for s, e in zip(starts, ends)]
+
+
+def fetch_events_sharded(params, client, start_date, end_date, freq="month",
+                         max_workers=MAX_CONCURRENCY, on_page=None, page_size=PAGE_SIZE,
+                         on_chunk=None):
+    """Fetch ``start_date``..``end_date`` as parallel date shards and merge them.
+
+    Shards run on a bounded thread pool sharing the client's pooled session.
+    ``on_page`` is called from the calling thread with the running row count,
+    so it may safely touch Streamlit elements. ``on_chunk`` receives every
+    converted page from the shard thread that fetched it; an exception it
+    raises stops the whole fetch. Returns ``None`` when no shard matched any
+    events.
+    """
+    shards = shard_period(start_date, end_date, freq)
+    rows_seen = [0]
+    lock = threading.Lock()
+
+    def count_rows(n):
+        with lock:
+            rows_seen[0] += n
+
+    def fetch_shard(shard):
+        shard_params = {**params, "event_date": f"{shard[0]}|{shard[1]}", "event_date_where": "BETWEEN"}
+        chunks = []
+        for records in iter_pages(shard_params, client, page_size=page_size):
+            chunk = records_to_frame(records)
+            chunks.append(chunk)
+            count_rows(len(records))
+            if on_chunk is not None:
+                on_chunk(chunk)
+        return chunks
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Each shard runs in a copy of the caller's context so its pages are
+        # counted against the caller's instrumentation stage.
+        futures = [pool.submit(contextvars.copy_context().run, fetch_shard, shard) for shard in shards]
+        pending = set(futures)
+        reported = 0
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    for other in pending:
+                        other.cancel()
+                    raise future.exception()
+            if on_page is not None and rows_seen[0] != reported:
+                reported = rows_seen[0]
+                on_page(reported)
+        # Shards are in date order, so concatenating them in submission
+        # order keeps the merged frame in date order.
+        chunks = [chunk for future in futures for chunk in future.result()]
+
+    if not chunks:
+        return None
+    df = pd.concat(chunks, ignore_index=True)
+    return df.sort_values('event_date', kind='stable', ignore_index=True)
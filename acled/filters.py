@@ -0,0 +1,204 @@
+"""Indexed in-memory filtering of a loaded event frame.
+
+An ``EventIndex`` is built once per dataset: for each filterable categorical
+column, the sorted row positions of every category (an inverted index), the
+fatalities in sorted order, and the event dates (frames arrive sorted by
+date, so a date range is a contiguous slice). A filter then only touches the
+position lists it names, intersecting the smallest candidate set first,
+instead of scanning every row with boolean masks.
+
+Filtered views are memoized per dataset and filter, so every page (and every
+rerun) asks for the same view object and the identity-keyed memos built on
+top of it (density grids, hexagons, polygon assignments) keep hitting.
+"""
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from acled.memo import frame_lru, frame_memo, memo_peek
+
+INDEXED_COLUMNS = ("country", "actor1", "actor2", "interaction", "admin1", "admin2")
+MAX_VIEWS = 8
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """A filter over the loaded events; empty tuples and ``None`` mean "any"."""
+    countries: tuple = ()
+    actors: tuple = ()
+    interactions: tuple = ()
+    admin1: tuple = ()
+    admin2: tuple = ()
+    min_fatalities: int = 0
+    start_date: object = None
+    end_date: object = None
+
+    @property
+    def active(self):
+        return bool(
+            self.countries or self.actors or self.interactions or self.admin1 or self.admin2
+            or self.min_fatalities > 0 or self.start_date is not None or self.end_date is not None
+        )
+
+
+def _sorted_positions(parts, n_rows):
+    """Union of position arrays as one sorted array.
+
+    Large unions go through a bitmap (one scatter and one ``flatnonzero``),
+    which beats sorting once the positions cover a fair share of the rows.
+    """
+    total = sum(len(part) for part in parts)
+    if total * 16 < n_rows:
+        return np.unique(np.concatenate(parts)) if len(parts) > 1 else np.sort(parts[0])
+    marks = np.zeros(n_rows, dtype=bool)
+    for part in parts:
+        marks[part] = True
+    return np.flatnonzero(marks)
+
+
+def _intersect(a, b):
+    """Intersection of two sorted, unique position arrays."""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return _EMPTY
+    hits = np.searchsorted(b, a)
+    hits[hits == len(b)] = 0
+    return a[b[hits] == a]
+
+
+class EventIndex:
+    def __init__(self, n_rows, postings, dates, date_order, fatalities, fatalities_order):
+        self.n_rows = n_rows
+        self.postings = postings
+        self._dates = dates
+        self._date_order = date_order
+        self._fatalities = fatalities
+        self._fatalities_order = fatalities_order
+
+    @classmethod
+    def build(cls, frame):
+        postings = {}
+        for column in INDEXED_COLUMNS:
+            if column not in frame:
+                continue
+            values = frame[column]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            codes = values.cat.codes.to_numpy()
+            # A stable sort keeps positions ascending within each category.
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(values.cat.categories) + 1))
+            postings[column] = {
+                category: order[bounds[i]:bounds[i + 1]]
+                for i, category in enumerate(values.cat.categories)
+                if bounds[i + 1] > bounds[i]
+            }
+
+        dates = pd.to_datetime(frame['event_date']).to_numpy()
+        date_order = None
+        if not pd.Index(dates).is_monotonic_increasing:
+            date_order = np.argsort(dates, kind='stable')
+            dates = dates[date_order]
+
+        fatalities = frame['fatalities'].to_numpy(dtype='float64', na_value=np.nan)
+        fatalities_order = np.argsort(fatalities, kind='stable')  # NaN last
+        return cls(len(frame), postings, dates, date_order, fatalities[fatalities_order], fatalities_order)
+
+    def options(self, column):
+        """Categories of ``column`` present in the frame, most frequent first."""
+        postings = self.postings.get(column, {})
+        return sorted(postings, key=lambda category: -len(postings[category]))
+
+    def date_bounds(self):
+        if not len(self._dates):
+            return None, None
+        return pd.Timestamp(self._dates[0]).date(), pd.Timestamp(self._dates[-1]).date()
+
+    def category_rows(self, columns, values):
+        """Rows whose value in any of ``columns`` is one of ``values``."""
+        parts = [
+            self.postings[column][value]
+            for column in columns if column in self.postings
+            for value in values if value in self.postings[column]
+        ]
+        if not parts:
+            return _EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        return _sorted_positions(parts, self.n_rows)
+
+    def date_rows(self, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self._dates, np.datetime64(pd.Timestamp(start)), 'left')
+        hi = len(self._dates) if end is None else np.searchsorted(
+            self._dates, np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)), 'left'
+        )
+        if self._date_order is None:
+            return np.arange(lo, hi, dtype=np.intp)
+        return _sorted_positions([self._date_order[lo:hi]], self.n_rows)
+
+    def fatality_rows(self, minimum):
+        lo = np.searchsorted(self._fatalities, minimum, 'left')
+        hi = np.searchsorted(self._fatalities, np.inf, 'right')  # excludes NaN
+        return _sorted_positions([self._fatalities_order[lo:hi]], self.n_rows)
+
+    def select(self, spec):
+        """Sorted positions of the rows matching ``spec`` (an ``EventFilter``)."""
+        candidates = []
+        if spec.actors:
+            candidates.append(self.category_rows(("actor1", "actor2"), spec.actors))
+        for column, values in (
+            ("country", spec.countries), ("interaction", spec.interactions), ("admin1", spec.admin1), ("admin2", spec.admin2),
+        ):
+            if values:
+                candidates.append(self.category_rows((column,), values))
+        if spec.min_fatalities > 0:
+            candidates.append(self.fatality_rows(spec.min_fatalities))
+        if spec.start_date is not None or spec.end_date is not None:
+            candidates.append(self.date_rows(spec.start_date, spec.end_date))
+        if not candidates:
+            return np.arange(self.n_rows, dtype=np.intp)
+
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            rows = _intersect(rows, other)
+        return rows
+
+
+def event_index(frame):
+    """The ``EventIndex`` of ``frame``, built on first use."""
+    return frame_memo(frame, ("event_index",), lambda: EventIndex.build(frame))
+
+
+def filtered_view(frame, spec):
+    """``frame`` restricted to ``spec``; the same object for repeated calls.
+
+    The most recent ``MAX_VIEWS`` views per frame are kept. With no active
+    filter the frame itself is returned.
+    """
+    if spec is None or not spec.active:
+        return frame
+
+    def compute():
+        positions = event_index(frame).select(spec)
+        view = frame.take(positions)
+        # Derived results (e.g. polygon assignments) can be sliced from the
+        # full frame's. A weak reference avoids a cycle through the memo.
+        frame_memo(view, ("view_source",), lambda: (weakref.ref(frame), positions))
+        return view
+
+    return frame_lru(frame, ("filtered_views",), spec, compute, MAX_VIEWS)
+
+
+def view_source(frame):
+    """``(full_frame, positions)`` if ``frame`` is a filtered view, else ``None``."""
+    source = memo_peek(frame, ("view_source",))
+    if source is None:
+        return None
+    full_frame = source[0]()
+    return None if full_frame is None else (full_frame, source[1])
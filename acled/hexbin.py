@@ -0,0 +1,139 @@
+"""Multi-resolution hexagon aggregation of events.
+
+Events are binned into pointy-top hexagons on a local equirectangular
+projection (km), entirely with NumPy over the ``latitude``/``longitude``
+columns. Every level of ``LEVELS`` is computed at once per event frame, so
+switching the displayed level with the map zoom never re-aggregates.
+"""
+import folium
+import numpy as np
+import pandas as pd
+
+from acled.memo import frame_memo
+
+# (hexagon circumradius in km, first map zoom the level is shown at)
+LEVELS = (
+    (200, 0),
+    (100, 5),
+    (50, 6),
+    (25, 7),
+    (10, 8),
+    (5, 9),
+)
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+SQRT3 = np.sqrt(3)
+
+
+def level_for_zoom(zoom):
+    """Index in ``LEVELS`` of the hexagon size to draw at a map zoom."""
+    return max(i for i, (_, min_zoom) in enumerate(LEVELS) if zoom >= min_zoom)
+
+
+def _project(lon, lat, lat0):
+    return lon * KM_PER_DEG_LON * np.cos(np.radians(lat0)), lat * KM_PER_DEG_LAT
+
+
+def _unproject(x, y, lat0):
+    return x / (KM_PER_DEG_LON * np.cos(np.radians(lat0))), y / KM_PER_DEG_LAT
+
+
+def _axial_round(q, r):
+    """Round fractional axial coordinates to the containing hexagon."""
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype('int64'), rr.astype('int64')
+
+
+def hex_cells(lon, lat, fatalities, interaction, size_km, lat0):
+    """Aggregate points into hexagons of circumradius ``size_km``.
+
+    Returns one row per occupied hexagon with its axial ``q``/``r``, centre
+    ``longitude``/``latitude``, ``events``, ``fatalities`` and the most
+    frequent ``interaction``.
+    """
+    x, y = _project(lon, lat, lat0)
+    q, r = _axial_round((SQRT3 / 3 * x - y / 3) / size_km, (2 / 3 * y) / size_km)
+    events = pd.DataFrame({'q': q, 'r': r, 'fatalities': fatalities, 'interaction': interaction})
+
+    cells = events.groupby(['q', 'r']).agg(
+        events=('fatalities', 'size'),
+        fatalities=('fatalities', 'sum'),
+    )
+    by_interaction = events.groupby(['q', 'r', 'interaction'], observed=True).size()
+    dominant = (
+        by_interaction.sort_values(ascending=False)
+        .reset_index()
+        .drop_duplicates(['q', 'r'])
+        .set_index(['q', 'r'])['interaction']
+    )
+    cells = cells.join(dominant.astype('string')).reset_index()
+
+    cx = size_km * SQRT3 * (cells['q'] + cells['r'] / 2)
+    cy = size_km * 1.5 * cells['r']
+    cells['longitude'], cells['latitude'] = _unproject(cx.to_numpy(), cy.to_numpy(), lat0)
+    return cells
+
+
+def hex_pyramid(gdf):
+    """Hexagon cells for every level in ``LEVELS``, memoized per event frame."""
+    def compute():
+        lon = gdf['longitude'].to_numpy(dtype='float64')
+        lat = gdf['latitude'].to_numpy(dtype='float64')
+        fatalities = gdf['fatalities'].to_numpy(dtype='int64')
+        interaction = gdf['interaction'].to_numpy()
+        lat0 = float(np.mean(lat)) if len(lat) else 0.0
+        return tuple(
+            hex_cells(lon, lat, fatalities, interaction, size_km, lat0)
+            for size_km, _ in LEVELS
+        ), lat0
+
+    return frame_memo(gdf, ("hex_pyramid", LEVELS), compute)
+
+
+def hexagon_features(cells, size_km, lat0):
+    """GeoJSON features for hexagon cells, vertices computed in one pass."""
+    angles = np.radians(30 + 60 * np.arange(7))  # closed ring
+    cx, cy = _project(cells['longitude'].to_numpy(), cells['latitude'].to_numpy(), lat0)
+    vx, vy = _unproject(
+        cx[:, None] + size_km * np.cos(angles),
+        cy[:, None] + size_km * np.sin(angles),
+        lat0,
+    )
+    rings = np.round(np.stack([vx, vy], axis=-1), 4).tolist()
+    props = cells[['events', 'fatalities', 'interaction']].astype({'interaction': object}).to_dict('records')
+    return [
+        {"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": p}
+        for ring, p in zip(rings, props)
+    ]
+
+
+def _fill(value, top):
+    """Yellow→red ramp on a log scale."""
+    v = np.log1p(value) / np.log1p(top) if top > 0 else 0.0
+    return f"#ff{int(255 * (1 - v)):02x}00"
+
+
+def add_hex_layer(m, cells, size_km, lat0, metric="fatalities", name="Conflict hexagons"):
+    """Draw hexagon cells coloured by ``metric`` ("fatalities" or "events")."""
+    top = int(cells[metric].max()) if len(cells) else 0
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": hexagon_features(cells, size_km, lat0)},
+        name=name,
+        style_function=lambda feature: {
+            "fillColor": _fill(feature["properties"][metric], top),
+            "color": "#555555",
+            "weight": 0.5,
+            "fillOpacity": 0.6,
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=["events", "fatalities", "interaction"],
+            aliases=["Events", "Fatalities", "Main interaction"],
+        ),
+    ).add_to(m)
@@ -0,0 +1,250 @@
+"""Per-stage timing and memory instrumentation for the events pipeline.
+
+Wrap a pipeline step in ``stage``::
+
+    with stage("fetch", iso3="AFG") as s:
+        df = ...
+        s.rows = len(df)
+
+Each stage records wall time, rows, bytes transferred and peak memory into
+a process-wide ring buffer that the pages show in the sidebar. Code deeper
+down (the HTTP pages, say) adds to the enclosing stage with ``count``
+without knowing about it; the stage travels in a context variable, so
+worker threads started with ``contextvars.copy_context`` report to it too.
+
+Peak memory is the growth of the process high-water mark during the stage
+(cheap, but zero once a larger peak has been reached), or the
+Python-allocation peak when tracemalloc capture is on. tracemalloc has one
+process-wide peak, so that is only reset when no other traced stage is
+running; stages that overlap (nested, worker threads, other sessions) get
+an approximate upper bound that includes each other's allocations. cProfile capture is
+opt-in as well, via ``set_capture`` or the ``ACLED_PROFILE`` and
+``ACLED_TRACEMALLOC`` environment variables, because both slow the app
+down. ``ACLED_METRICS_JSONL`` and ``ACLED_METRICS_PROM`` name files that
+receive every record as JSON lines and the running totals in Prometheus
+text format (for a node-exporter textfile collector).
+"""
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MAX_RECORDS = 1000
+PROFILE_LINES = 25
+
+JSONL_PATH = os.getenv("ACLED_METRICS_JSONL")
+PROM_PATH = os.getenv("ACLED_METRICS_PROM")
+
+_records = deque(maxlen=MAX_RECORDS)
+_totals = {}
+_lock = threading.Lock()
+_export_lock = threading.Lock()  # serialises the metrics files, so the newest totals land last
+_current = contextvars.ContextVar("acled_stage", default=None)
+_profiling = threading.local()
+_traced_stages = 0  # traced stages running, in any thread
+_capture = {
+    "profile": os.getenv("ACLED_PROFILE") == "1",
+    "tracemalloc": os.getenv("ACLED_TRACEMALLOC") == "1",
+}
+
+
+@dataclass
+class StageRecord:
+    name: str
+    labels: dict = field(default_factory=dict)
+    started_at: float = 0.0
+    seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    peak_bytes: int = 0
+    thread: str = ""
+    profile: str = None
+
+    def count(self, rows=0, nbytes=0):
+        with _lock:
+            self.rows += rows
+            self.bytes += nbytes
+
+
+def set_capture(profile=None, memory=None):
+    """Turn cProfile (``profile``) and tracemalloc (``memory``) capture on or off.
+
+    The setting is process-wide and applies to stages started afterwards.
+    """
+    if profile is not None:
+        _capture["profile"] = profile
+    if memory is not None:
+        _capture["tracemalloc"] = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def capture_settings():
+    return dict(_capture)
+
+
+def _max_rss():
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def count(rows=0, nbytes=0):
+    """Add rows/bytes to the innermost active stage, if any."""
+    record = _current.get()
+    if record is not None:
+        record.count(rows, nbytes)
+
+
+@contextmanager
+def stage(name, **labels):
+    """Time the enclosed block as pipeline stage ``name``; yields its record."""
+    record = StageRecord(
+        name, labels, started_at=time.time(), thread=threading.current_thread().name
+    )
+    token = _current.set(record)
+
+    global _traced_stages
+    tracing = _capture["tracemalloc"] and tracemalloc.is_tracing()
+    if tracing:
+        with _lock:
+            # Resetting would wipe the peak of a stage already running.
+            if _traced_stages == 0:
+                tracemalloc.reset_peak()
+            _traced_stages += 1
+        traced_before = tracemalloc.get_traced_memory()[0]
+    rss_before = _max_rss()
+
+    # cProfile can only run one profiler per thread, so nested stages are
+    # covered by the outermost one.
+    profiler = None
+    if _capture["profile"] and not getattr(_profiling, "active", False):
+        profiler = cProfile.Profile()
+        _profiling.active = True
+        profiler.enable()
+
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            _profiling.active = False
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            record.profile = out.getvalue()
+        if tracing:
+            with _lock:
+                _traced_stages -= 1
+        if tracing and tracemalloc.is_tracing():
+            record.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - traced_before)
+        else:
+            record.peak_bytes = max(0, _max_rss() - rss_before)
+        _current.reset(token)
+        _record(record)
+
+
+def _record(record):
+    with _lock:
+        _records.append(record)
+        totals = _totals.setdefault(record.name, {
+            "calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0, "peak_bytes": 0,
+        })
+        totals["calls"] += 1
+        totals["seconds"] += record.seconds
+        totals["rows"] += record.rows
+        totals["bytes"] += record.bytes
+        totals["peak_bytes"] = max(totals["peak_bytes"], record.peak_bytes)
+    if JSONL_PATH or PROM_PATH:
+        _export(record)
+
+
+def _export(record):
+    # Runs in stage()'s finally: a metrics file must never fail the stage itself.
+    with _export_lock:
+        try:
+            if JSONL_PATH:
+                with open(JSONL_PATH, "a") as f:
+                    f.write(to_jsonl([record]))
+            if PROM_PATH:
+                with _lock:
+                    prometheus = to_prometheus()
+                # Write then rename so a scraper never reads a half-written file.
+                tmp_path = f"{PROM_PATH}.tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(prometheus)
+                os.replace(tmp_path, PROM_PATH)
+        except (OSError, TypeError, ValueError) as exc:
+            print(f"acled.instrument: could not write metrics: {exc}", file=sys.stderr)
+
+
+def recent(limit=None):
+    """The most recent stage records, newest first."""
+    with _lock:
+        records = list(_records)
+    records.reverse()
+    return records[:limit] if limit else records
+
+
+def to_jsonl(records):
+    """Stage records as JSON lines (the cProfile text is left out).
+
+    Label values JSON has no type for (dates, numpy scalars) are written as strings.
+    """
+    lines = []
+    for record in records:
+        data = asdict(record)
+        del data["profile"]
+        lines.append(json.dumps(data, default=str) + "\n")
+    return "".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(totals=None):
+    """Per-stage totals (default: the running ones) in Prometheus text format."""
+    totals = _totals if totals is None else totals
+    metrics = [
+        ("acled_stage_calls_total", "counter", "Stage executions.", "calls"),
+        ("acled_stage_seconds_total", "counter", "Wall time spent in the stage.", "seconds"),
+        ("acled_stage_rows_total", "counter", "Rows processed by the stage.", "rows"),
+        ("acled_stage_bytes_total", "counter", "Bytes transferred by the stage.", "bytes"),
+        ("acled_stage_peak_bytes", "gauge", "Largest memory peak seen in the stage.", "peak_bytes"),
+    ]
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, values in sorted(totals.items()):
+            lines.append(f'{metric}{{stage="{_escape(name)}"}} {values[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def totals():
+    with _lock:
+        return {name: dict(values) for name, values in _totals.items()}
+
+
+if _capture["tracemalloc"]:
+    tracemalloc.start()
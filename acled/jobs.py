@@ -0,0 +1,138 @@
+"""Background fetch jobs shared by every session in the process.
+
+A fetch runs on a worker pool instead of inside the Streamlit script run, so
+the page stays responsive and can be left, revisited or cancelled. Jobs are
+keyed like registry datasets: a request identical to one already in flight
+subscribes to that job instead of starting a second download. While a job
+runs it exposes its row count and the latest pages received, so pages can
+draw partial results.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+MAX_WORKERS = int(os.getenv("ACLED_JOB_WORKERS", "4"))
+
+QUEUED, RUNNING, DONE, EMPTY, FAILED, CANCELLED = (
+    "queued", "running", "done", "empty", "failed", "cancelled",
+)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.status = QUEUED
+        self.rows = 0
+        self.result = None
+        self.error = None
+        self.details = {}
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.subscribers = 1
+        self._chunks = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Withdraw one subscriber; the job stops once nobody is waiting for it."""
+        with self._lock:
+            self.subscribers -= 1
+            if self.subscribers <= 0:
+                self._cancel.set()
+
+    def check(self):
+        """Raise ``JobCancelled`` if the job has been cancelled."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, rows):
+        self.check()
+        self.rows = rows
+
+    def add_chunk(self, chunk):
+        """Record a page of events as it arrives (called from fetch threads)."""
+        self.check()
+        with self._lock:
+            self._chunks.append(chunk)
+
+    def recent(self, limit):
+        """The last ``limit`` events received so far as one frame, or ``None``.
+
+        Only the trailing pages that hold them are concatenated, so a preview
+        costs the same however much has been downloaded.
+        """
+        with self._lock:
+            chunks = list(self._chunks)
+        tail, n = [], 0
+        for chunk in reversed(chunks):
+            if n >= limit:
+                break
+            tail.append(chunk)
+            n += len(chunk)
+        if not tail:
+            return None
+        return pd.concat(tail[::-1], ignore_index=True).tail(limit)
+
+
+class JobManager:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="acled-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, run):
+        """Start ``run(job)`` for ``key`` or join the identical job in flight.
+
+        ``run`` should call ``job.progress``/``job.add_chunk`` as data arrives
+        (both raise ``JobCancelled`` once the job is cancelled) and return the
+        result, or ``None`` when there is no data.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.active and not job.cancelled:
+                with job._lock:
+                    job.subscribers += 1
+                return job
+            job = self._jobs[key] = Job(key)
+        self._pool.submit(self._run, job, run)
+        return job
+
+    def _run(self, job, run):
+        try:
+            job.check()
+            job.status = RUNNING
+            job.result = run(job)
+            job.status = DONE if job.result is not None else EMPTY
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            # Finished jobs live on only in the sessions that hold them; the
+            # result itself is in the dataset registry by now.
+            with job._lock:
+                job._chunks = []
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def active_jobs(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if job.active]
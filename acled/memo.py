@@ -0,0 +1,65 @@
+"""Memoization keyed on the identity of a loaded event frame.
+
+Event frames live in session state for as long as a dataset is loaded, so
+derived results (polygon assignments, density grids, ...) can be cached per
+frame object. Entries are dropped by a weakref finalizer as soon as the
+frame is garbage collected, so nothing outlives its dataset.
+
+Frames are shared by every session through the dataset registry, so these
+caches are reached from several script threads at once: all reads and
+updates happen under a lock, and the first value stored for a key wins.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def frame_memo(frame, key, compute):
+    """Return ``compute()`` cached for ``(frame, key)``.
+
+    ``key`` must be hashable and capture every parameter ``compute`` uses
+    besides the frame itself.
+    """
+    frame_id = id(frame)
+    with _lock:
+        entries = _memo.get(frame_id)
+        if entries is not None and key in entries:
+            return entries[key]
+
+    value = compute()
+    with _lock:
+        if frame_id not in _memo:
+            _memo[frame_id] = {}
+            weakref.finalize(frame, _memo.pop, frame_id, None)
+        return _memo[frame_id].setdefault(key, value)
+
+
+def frame_lru(frame, key, item, compute, maxsize):
+    """Return ``compute()`` cached under ``item`` in a per-frame LRU of ``maxsize`` entries.
+
+    For results with many possible parameters (filter specs, search texts),
+    of which only the most recent few are worth keeping.
+    """
+    entries = frame_memo(frame, key, OrderedDict)
+    with _lock:
+        value = entries.get(item)
+        if value is not None:
+            entries.move_to_end(item)
+            return value
+
+    value = compute()
+    with _lock:
+        value = entries.setdefault(item, value)
+        entries.move_to_end(item)
+        while len(entries) > maxsize:
+            entries.popitem(last=False)
+    return value
+
+
+def memo_peek(frame, key, default=None):
+    """The value memoized for ``(frame, key)``, without computing it."""
+    with _lock:
+        return _memo.get(id(frame), {}).get(key, default)
@@ -0,0 +1,166 @@
+"""Local store of country reference geometries, indexed by ISO3.
+
+The world ``countries.geojson`` is downloaded once per machine and kept as
+GeoParquet in the cache directory, together with precomputed centroids and
+bounds. Lookups are dictionary hits on ISO3 instead of a full parse of the
+world file. Without network access the store falls back to the bundled
+``data/countries_lowres.parquet`` (Natural Earth 1:110m, public domain), which
+covers 177 countries; for the small states it lacks, ``center`` and
+``bounds`` take the extent of the loaded events instead.
+
+``read_country_lookup`` reads the bundled table of country names, ISO3
+codes and the numeric codes ACLED queries use.
+"""
+import os
+import threading
+
+from acled.store import CACHE_DIR
+
+COUNTRIES_URL = "https://raw.githubusercontent.com/datasets/geo-countries/master/data/countries.geojson"
+# Country groups that are routinely compared, as ISO3 codes.
+REGION_PRESETS = {
+    "Central Sahel": ("BFA", "MLI", "NER"),
+    "Sahel (G5)": ("BFA", "MLI", "MRT", "NER", "TCD"),
+    "Lake Chad Basin": ("CMR", "NER", "NGA", "TCD"),
+    "Horn of Africa": ("DJI", "ERI", "ETH", "SOM"),
+    "Greater Horn of Africa": ("DJI", "ERI", "ETH", "KEN", "SDN", "SOM", "SSD", "UGA"),
+}
+
+CACHE_PATH = os.path.join(CACHE_DIR, "countries.parquet")
+BUNDLED_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "countries_lowres.parquet")
+COUNTRY_LOOKUP_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "country_lookup.csv")
+
+
+def read_country_lookup(path=COUNTRY_LOOKUP_PATH):
+    """Country name -> ISO3, ISO numeric and ACLED name, from the bundled table."""
+    import pandas as pd
+
+    lookup = pd.read_csv(path, delimiter=';', keep_default_na=False)
+    return {
+        name: {
+            'alpha3': alpha3,
+            'country_code': int(country_code),
+            'acled_name': acled_name or None
+        }
+        for name, alpha3, country_code, acled_name in zip(
+            lookup['name'], lookup['alpha3'], lookup['country_code'], lookup['acled_name']
+        )
+    }
+
+
+def events_bounds(events):
+    """Return ``(minx, miny, maxx, maxy)`` of an event frame's coordinates."""
+    lon, lat = events['longitude'], events['latitude']
+    return float(lon.min()), float(lat.min()), float(lon.max()), float(lat.max())
+
+
+def _normalize(countries):
+    """Reduce a source file to ``iso3``, ``name`` and ``geometry``, one row per ISO3."""
+    if 'ISO3166-1-Alpha-3' in countries:
+        countries = countries.rename(columns={'ISO3166-1-Alpha-3': 'iso3'})
+    countries = countries[['iso3', 'name', 'geometry']]
+    countries = countries[countries['iso3'].str.len() == 3]
+    return countries.drop_duplicates('iso3').reset_index(drop=True)
+
+
+def _with_summaries(countries):
+    import shapely
+
+    geoms = countries.geometry.values
+    centroids = shapely.centroid(geoms)
+    bounds = shapely.bounds(geoms)
+    return countries.assign(
+        centroid_lon=shapely.get_x(centroids),
+        centroid_lat=shapely.get_y(centroids),
+        minx=bounds[:, 0], miny=bounds[:, 1], maxx=bounds[:, 2], maxy=bounds[:, 3],
+    )
+
+
+class CountryStore:
+    def __init__(self, countries, source):
+        self.countries = countries
+        self.source = source
+        self._rows = {iso3: i for i, iso3 in enumerate(countries['iso3'])}
+
+    @classmethod
+    def load(cls, cache_path=CACHE_PATH, url=COUNTRIES_URL, bundled_path=BUNDLED_PATH):
+        """Open the cached store, building it from ``url`` on first use.
+
+        Falls back to the bundled low-resolution file when the download fails.
+        """
+        import geopandas as gpd  # deferred: keeps it off the page's cold start
+
+        if os.path.exists(cache_path):
+            return cls(gpd.read_parquet(cache_path), "cache")
+        try:
+            countries = _with_summaries(_normalize(gpd.read_file(url)))
+        except Exception as e:
+            print(f"Could not download country geometries ({e}); using bundled file.")
+            return cls(_with_summaries(_normalize(gpd.read_parquet(bundled_path))), "bundled")
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        countries.to_parquet(cache_path, index=False)
+        return cls(countries, "download")
+
+    def __contains__(self, iso3):
+        return iso3 in self._rows
+
+    def _row(self, iso3):
+        try:
+            return self._rows[iso3]
+        except KeyError:
+            raise ValueError(f"No country found with ISO3 code: {iso3}") from None
+
+    def mask(self, iso3):
+        """Return the country polygon for ``iso3`` as a one-row GeoDataFrame."""
+        i = self._row(iso3)
+        return self.countries.iloc[i:i + 1]
+
+    def _missing(self, iso3, events):
+        return iso3 not in self and events is not None and len(events) > 0
+
+    def center(self, iso3, events=None):
+        """Return the precomputed ``[lat, lon]`` centroid of ``iso3``.
+
+        A country the store has no geometry for is centred on the extent of
+        ``events`` when they are given.
+        """
+        if self._missing(iso3, events):
+            minx, miny, maxx, maxy = events_bounds(events)
+            return [(miny + maxy) / 2, (minx + maxx) / 2]
+        row = self.countries.iloc[self._row(iso3)]
+        return [float(row['centroid_lat']), float(row['centroid_lon'])]
+
+    def bounds(self, iso3, events=None):
+        """Return ``(minx, miny, maxx, maxy)`` of ``iso3`` (or of ``events``, as for ``center``)."""
+        if self._missing(iso3, events):
+            return events_bounds(events)
+        row = self.countries.iloc[self._row(iso3)]
+        return tuple(float(row[c]) for c in ('minx', 'miny', 'maxx', 'maxy'))
+
+    def region_bounds(self, iso3s, events=None):
+        """Return the ``(minx, miny, maxx, maxy)`` enclosing several countries."""
+        boxes = [self.bounds(iso3, events) for iso3 in iso3s]
+        return (
+            min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes),
+        )
+
+    def region_center(self, iso3s, events=None):
+        """Return the ``[lat, lon]`` centre of the box enclosing several countries."""
+        if len(iso3s) == 1:
+            return self.center(iso3s[0], events)
+        minx, miny, maxx, maxy = self.region_bounds(iso3s, events)
+        return [(miny + maxy) / 2, (minx + maxx) / 2]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_country_store():
+    """Process-wide ``CountryStore``, loaded on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CountryStore.load()
+        return _store
@@ -0,0 +1,133 @@
+"""Process-wide registry of loaded event datasets.
+
+Analysts tend to look at the same few countries, so rather than every
+session holding its own copy of a dataset, the registry keeps one compacted
+frame per ``(iso, period)`` and hands every session that asks for it the
+same object. Sessions hold a ``DatasetHandle``; the dataset is pinned while
+any handle is alive and released when the handle is garbage collected
+(session ends, country changes, a new dataset replaces it). Unpinned
+datasets are evicted least recently used first once the registry is over
+its memory budget.
+
+Shared frames are read-only by contract: pages filter and aggregate them
+(which, with pandas copy-on-write, never writes back) but must not assign
+into them. Keeping one object per dataset is also what lets the identity
+memo in ``acled.memo`` share derived results across sessions.
+"""
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from acled.schema import memory_footprint
+from acled.store import STALE_AFTER
+
+MAX_BYTES = int(float(os.getenv("ACLED_REGISTRY_MAX_MB", "1024")) * 1024 ** 2)
+
+
+@dataclass(eq=False)
+class Dataset:
+    key: tuple
+    frame: object
+    center_latlon: list
+    cube: object
+    nbytes: int
+    loaded_at: float = field(default_factory=time.time)
+    refs: int = 0
+
+
+class DatasetHandle:
+    """A session's reference to a registry dataset; releases it when dropped."""
+
+    def __init__(self, registry, dataset):
+        self.dataset = dataset
+        self._release = weakref.finalize(self, registry._release, dataset)
+
+    def release(self):
+        self._release()
+
+
+class DatasetRegistry:
+    def __init__(self, max_bytes=MAX_BYTES, max_age=STALE_AFTER):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._datasets = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, load):
+        """Return a handle to the dataset for ``key``, loading it if needed.
+
+        ``load()`` returns ``(frame, center_latlon, cube)`` or ``None`` when
+        there is no data; ``None`` is returned as is and nothing is stored.
+        Concurrent requests for the same key wait for a single load.
+        """
+        while True:
+            with self._lock:
+                dataset = self._datasets.get(key)
+                if dataset is not None and time.time() - dataset.loaded_at < self.max_age:
+                    self._datasets.move_to_end(key)
+                    dataset.refs += 1
+                    return DatasetHandle(self, dataset)
+                done = self._loading.get(key)
+                if done is None:
+                    done = self._loading[key] = threading.Event()
+                    break
+            done.wait()
+
+        try:
+            loaded = load()
+            if loaded is None:
+                return None
+            frame, center_latlon, cube = loaded
+            dataset = Dataset(
+                key, frame, center_latlon, cube,
+                nbytes=memory_footprint(frame), refs=1,
+            )
+            with self._lock:
+                self._datasets[key] = dataset
+                self._datasets.move_to_end(key)
+                self._evict()
+            return DatasetHandle(self, dataset)
+        finally:
+            with self._lock:
+                del self._loading[key]
+            done.set()
+
+    def get(self, key):
+        """A new handle to the dataset for ``key`` if it is loaded, else ``None``."""
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is None:
+                return None
+            self._datasets.move_to_end(key)
+            dataset.refs += 1
+            return DatasetHandle(self, dataset)
+
+    def _release(self, dataset):
+        with self._lock:
+            dataset.refs -= 1
+            self._evict()
+
+    def _evict(self):
+        # Only unpinned datasets can be dropped: evicting one a session still
+        # holds would free nothing and lose the sharing for later sessions.
+        for key in list(self._datasets):
+            if self._size_bytes() <= self.max_bytes:
+                break
+            if self._datasets[key].refs == 0:
+                del self._datasets[key]
+
+    def _size_bytes(self):
+        return sum(dataset.nbytes for dataset in self._datasets.values())
+
+    def size_bytes(self):
+        with self._lock:
+            return self._size_bytes()
+
+    def stats(self):
+        """``(key, refs, nbytes)`` for every registered dataset, oldest use first."""
+        with self._lock:
+            return [(d.key, d.refs, d.nbytes) for d in self._datasets.values()]
@@ -0,0 +1,134 @@
+"""Map layers for the events page that stay light as event counts grow.
+
+Up to ``POINT_THRESHOLD`` events are drawn as one GeoJSON layer of circle
+markers (one shared popup template instead of an HTML popup per marker).
+Above it, events are aggregated server-side into a regular grid and each
+occupied cell is drawn as a single marker sized by its event count. The
+layers can be added to a map or to a ``FeatureGroup`` (for maps that update
+their layers in place, see ``acled.viewport``).
+"""
+import os
+
+import folium
+import numpy as np
+import pandas as pd
+
+POINT_THRESHOLD = int(os.getenv("ACLED_MAP_POINT_THRESHOLD", "20000"))
+GRID_CELLS = 150  # cells along the longer side of the data extent
+COORD_DECIMALS = 4  # ~10 m, the precision ACLED publishes
+
+FATAL_COLOR = "red"
+NON_FATAL_COLOR = "black"
+
+
+def _color(fatalities):
+    return FATAL_COLOR if fatalities > 0 else NON_FATAL_COLOR
+
+
+def _point_features(gdf):
+    lon = np.round(gdf['longitude'].to_numpy(dtype='float64'), COORD_DECIMALS).tolist()
+    lat = np.round(gdf['latitude'].to_numpy(dtype='float64'), COORD_DECIMALS).tolist()
+    fatalities = gdf['fatalities'].astype('int64').tolist()
+    admin1 = gdf['admin1'].astype(str).tolist()
+    dates = gdf['event_date'].dt.strftime('%Y-%m-%d').tolist()
+    return [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [x, y]},
+            "properties": {"fatalities": f, "admin1": a, "event_date": d},
+        }
+        for x, y, f, a, d in zip(lon, lat, fatalities, admin1, dates)
+    ]
+
+
+def grid_aggregate(gdf, cells=GRID_CELLS):
+    """Bin events into a square grid over their extent.
+
+    Returns one row per occupied cell with the event count, summed
+    fatalities and the mean event location (so markers sit on the events,
+    not on the cell corner).
+    """
+    lon = gdf['longitude'].to_numpy(dtype='float64')
+    lat = gdf['latitude'].to_numpy(dtype='float64')
+    min_lon, min_lat = lon.min(), lat.min()
+    cell = max(lon.max() - min_lon, lat.max() - min_lat, 1e-6) / cells
+    col = np.floor((lon - min_lon) / cell).astype('int64')
+    row = np.floor((lat - min_lat) / cell).astype('int64')
+    grid = pd.DataFrame({
+        'cell': row * (cells + 1) + col,
+        'longitude': lon,
+        'latitude': lat,
+        'fatalities': gdf['fatalities'].to_numpy(dtype='int64'),
+    })
+    return grid.groupby('cell').agg(
+        events=('fatalities', 'size'),
+        fatalities=('fatalities', 'sum'),
+        longitude=('longitude', 'mean'),
+        latitude=('latitude', 'mean'),
+    ).reset_index(drop=True)
+
+
+def _grid_features(cells):
+    lon = np.round(cells['longitude'].to_numpy(), COORD_DECIMALS).tolist()
+    lat = np.round(cells['latitude'].to_numpy(), COORD_DECIMALS).tolist()
+    return [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [x, y]},
+            "properties": {"events": n, "fatalities": f},
+        }
+        for x, y, n, f in zip(lon, lat, cells['events'].tolist(), cells['fatalities'].tolist())
+    ]
+
+
+def add_point_layer(m, gdf, name="Conflict events"):
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": _point_features(gdf)},
+        name=name,
+        marker=folium.CircleMarker(radius=6, fill=True, fill_opacity=0.7),
+        style_function=lambda feature: {
+            "color": _color(feature["properties"]["fatalities"]),
+            "fillColor": _color(feature["properties"]["fatalities"]),
+        },
+        popup=folium.GeoJsonPopup(
+            fields=["fatalities", "admin1", "event_date"],
+            aliases=["Fatalities", "Admin1", "Event date"],
+        ),
+    ).add_to(m)
+
+
+def add_cell_layer(m, cells, name="Conflict events (aggregated)"):
+    """Draw aggregated cells (``events``, ``fatalities`` and a mean location)."""
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": _grid_features(cells)},
+        name=name,
+        marker=folium.CircleMarker(radius=4, fill=True, fill_opacity=0.6),
+        style_function=lambda feature: {
+            "color": _color(feature["properties"]["fatalities"]),
+            "fillColor": _color(feature["properties"]["fatalities"]),
+            "radius": min(4 + 2 * np.sqrt(feature["properties"]["events"]), 30),
+        },
+        popup=folium.GeoJsonPopup(
+            fields=["events", "fatalities"],
+            aliases=["Events", "Fatalities"],
+        ),
+    ).add_to(m)
+
+
+def add_grid_layer(m, gdf, cells=GRID_CELLS, name="Conflict events (aggregated)"):
+    grid = grid_aggregate(gdf, cells)
+    add_cell_layer(m, grid, name)
+    return grid
+
+
+def add_event_layer(m, gdf, threshold=POINT_THRESHOLD):
+    """Add events as points, or as grid cells when there are more than ``threshold``.
+
+    Returns ``"points"`` or ``"grid"`` so the caller can tell the user which
+    mode was used.
+    """
+    if len(gdf) <= threshold:
+        add_point_layer(m, gdf)
+        return "points"
+    add_grid_layer(m, gdf)
+    return "grid"
@@ -0,0 +1,87 @@
+"""Compact dtypes for the event frame kept in every session.
+
+ACLED columns are highly repetitive (a few hundred actors and admin areas
+across hundreds of thousands of events), so storing them as ``category`` and
+narrowing the numeric columns cuts the per-session footprint several times.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = [
+    'actor1', 'actor2', 'interaction', 'country',
+    'admin1', 'admin2', 'admin3', 'location', 'geo_precision',
+]
+NARROW = {
+    'year': 'uint16',
+    'month': 'uint8',
+    'day': 'uint8',
+    'fatalities': 'int16',
+    'latitude': 'float32',
+    'longitude': 'float32',
+}
+
+
+def _narrow(series, dtype):
+    if dtype.startswith(('int', 'uint')):
+        info = np.iinfo(dtype)
+        if series.min() < info.min or series.max() > info.max:
+            dtype = 'int32'
+        if series.isna().any():
+            # Nullable integers keep missing values (e.g. unparseable dates).
+            dtype = dtype.replace('uint', 'UInt').replace('int', 'Int')
+    return series.astype(dtype)
+
+
+def compact(df):
+    """Return ``df`` with categorical strings and narrowed numeric columns.
+
+    ``event_date`` is parsed to ``datetime64``; columns that are absent are
+    skipped, so the function also works on partial frames.
+    """
+    df = df.copy()
+    if 'event_date' in df and not pd.api.types.is_datetime64_any_dtype(df['event_date']):
+        df['event_date'] = pd.to_datetime(df['event_date'], format="%Y-%m-%d", errors='coerce')
+    for column in CATEGORICAL:
+        if column in df:
+            df[column] = df[column].astype('category')
+    for column, dtype in NARROW.items():
+        if column in df:
+            df[column] = _narrow(df[column], dtype)
+    return df
+
+
+def concat_events(frames):
+    """Merge compacted event frames into one, ordered by ``event_date``.
+
+    Categorical columns get the union of the frames' categories first, so
+    they stay categorical instead of falling back to strings. The sort is
+    stable, so events of the same day keep the order of ``frames``.
+    """
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0]
+    unified = []
+    for column in CATEGORICAL:
+        present = [f[column] for f in frames if column in f]
+        if present and all(isinstance(c.dtype, pd.CategoricalDtype) for c in present):
+            categories = np.concatenate([c.cat.categories.to_numpy(dtype=object) for c in present])
+            unified.append((column, pd.Index(np.unique(categories))))
+    frames = [
+        f.assign(**{c: f[c].cat.set_categories(categories) for c, categories in unified if c in f})
+        for f in frames
+    ]
+    merged = pd.concat(frames, ignore_index=True)
+    order = np.argsort(merged['event_date'].to_numpy(), kind='stable')
+    return merged.take(order).reset_index(drop=True)
+
+
+def memory_footprint(df):
+    """Deep memory usage of ``df`` in bytes (GEOS geometries count as pointers)."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def format_bytes(n_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n_bytes < 1024 or unit == "GB":
+            return f"{n_bytes:,.0f} {unit}" if unit == "B" else f"{n_bytes:,.1f} {unit}"
+        n_bytes /= 1024
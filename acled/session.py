@@ -0,0 +1,308 @@
+"""Streamlit glue shared by the pages.
+
+The process-wide resources (dataset registry, job manager) are created here
+once per process, and every page uses the same helpers to follow this
+session's background fetch and to pick up its result.
+"""
+import pandas as pd
+import streamlit as st
+
+from acled import instrument
+from acled.export import FORMATS, export_events
+from acled.filters import EventFilter, event_index, filtered_view
+from acled.jobs import DONE, EMPTY, FAILED, JobManager
+from acled.registry import DatasetRegistry
+from acled.schema import format_bytes
+from acled.table import table_page, table_rows
+
+POLL_SECONDS = 1.0
+
+
+@st.cache_resource
+def get_dataset_registry():
+    """Loaded datasets shared by every session in this process."""
+    return DatasetRegistry()
+
+
+@st.cache_resource
+def get_job_manager():
+    """Background fetch jobs shared by every session in this process."""
+    return JobManager()
+
+
+def use_dataset(handle, **selection):
+    """Point this session (and so every page) at a registry dataset.
+
+    ``selection`` holds the session keys describing the dataset
+    (``selected_country``, ``start_date``, ...). The frame and cube are the
+    registry's shared objects; the handle keeps them pinned for as long as
+    this session holds it.
+    """
+    dataset = handle.dataset
+    st.session_state.update(selection)
+    st.session_state["dataset"] = handle
+    st.session_state["geo_acled"] = dataset.frame
+    st.session_state["center_latlon"] = dataset.center_latlon
+    st.session_state["cube"] = dataset.cube
+    st.session_state["data_loaded"] = True
+
+
+def start_fetch(key, run, **selection):
+    """Submit (or join) the fetch job for ``key`` on behalf of this session.
+
+    A session follows one fetch at a time: a different job it was still
+    following is cancelled for it (the job stops unless other sessions wait
+    for it too).
+    """
+    previous = st.session_state.get("fetch_job")
+    if previous is not None and previous.active:
+        if previous.key == key and not previous.cancelled:
+            st.session_state["fetch_selection"] = selection
+            return previous
+        previous.cancel()
+    job = get_job_manager().submit(key, run)
+    st.session_state["fetch_job"] = job
+    st.session_state["fetch_selection"] = selection
+    return job
+
+
+def finish_fetch():
+    """Collect this session's fetch job once it has finished.
+
+    A successful result becomes the session's dataset. Returns the finished
+    job (so the page can report its outcome) or ``None`` while nothing has
+    finished.
+    """
+    job = st.session_state.get("fetch_job")
+    if job is None or job.active:
+        return None
+    del st.session_state["fetch_job"]
+    selection = st.session_state.pop("fetch_selection", {})
+    if job.status == DONE:
+        handle = get_dataset_registry().get(job.key) or job.result
+        use_dataset(handle, **selection)
+    return job
+
+
+def show_fetch_outcome(job):
+    """The standard message for a finished job that produced no dataset."""
+    if job.status == FAILED:
+        st.error(f"Failed to fetch data: {job.error}")
+    elif job.status == EMPTY:
+        st.warning("No data available for this period. Please select a more recent date range.")
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _fetch_status(preview):
+    job = st.session_state.get("fetch_job")
+    if job is None:
+        return
+    if not job.active:
+        st.rerun(scope="app")
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.caption(f"⏳ Fetching conflict data in the background: {job.rows:,} events received...")
+    with col2:
+        if st.button("Cancel fetch"):
+            # Other sessions may be waiting for the same job; it only stops
+            # once all of them have cancelled.
+            job.cancel()
+            del st.session_state["fetch_job"]
+            st.session_state.pop("fetch_selection", None)
+            st.toast("Fetch cancelled.")
+            st.rerun(scope="app")
+    if preview is not None:
+        preview(job)
+
+
+def follow_fetch(preview=None):
+    """Show live progress of this session's running fetch, if any.
+
+    The status refreshes on its own and reruns the page once the job
+    finishes. ``preview(job)`` may draw partial results on every refresh;
+    it should stay bounded (see ``Job.recent``), since it runs every second.
+    Returns ``True`` while a fetch is running.
+    """
+    job = st.session_state.get("fetch_job")
+    if job is None or not job.active:
+        return False
+    _fetch_status(preview)
+    return True
+
+
+def filter_events(frame):
+    """Sidebar filters over the loaded events; returns the filtered view.
+
+    The filter lives in session state, so all pages show (and edit) the same
+    filtered view. It is reset when a different dataset is loaded.
+    """
+    index = event_index(frame)
+    handle = st.session_state.get("dataset")
+    dataset_key = handle.dataset.key if handle is not None else id(frame)
+    saved_key, spec = st.session_state.get("event_filter", (None, EventFilter()))
+    if saved_key != dataset_key:
+        spec = EventFilter()
+
+    def pick(label, column, selected, columns=None):
+        options = index.options(column)
+        if columns:
+            options += [o for c in columns for o in index.options(c) if o not in options]
+        return tuple(st.multiselect(label, options, default=[v for v in selected if v in options]))
+
+    with st.sidebar.expander("🔎 Filter events", expanded=spec.active):
+        first_date, last_date = index.date_bounds()
+        start_date, end_date = first_date, last_date
+        if first_date is not None and first_date < last_date:
+            start_date, end_date = st.slider(
+                "Dates", min_value=first_date, max_value=last_date,
+                value=(
+                    max(spec.start_date or first_date, first_date),
+                    min(spec.end_date or last_date, last_date),
+                ),
+            )
+        countries = ()
+        if len(index.options("country")) > 1:
+            countries = pick("Country", "country", spec.countries)
+        actors = pick("Actors", "actor1", spec.actors, columns=["actor2"])
+        interactions = pick("Interaction", "interaction", spec.interactions)
+        admin1 = pick("Admin1", "admin1", spec.admin1)
+        admin2 = pick("Admin2", "admin2", spec.admin2)
+        min_fatalities = int(st.number_input("Minimum fatalities", min_value=0, value=spec.min_fatalities))
+
+    spec = EventFilter(
+        countries=countries,
+        actors=actors,
+        interactions=interactions,
+        admin1=admin1,
+        admin2=admin2,
+        min_fatalities=min_fatalities,
+        start_date=start_date if start_date != first_date else None,
+        end_date=end_date if end_date != last_date else None,
+    )
+    st.session_state["event_filter"] = (dataset_key, spec)
+
+    with instrument.stage("filter") as s:
+        view = filtered_view(frame, spec)
+        s.rows = len(view)
+    if spec.active:
+        st.caption(f"🔎 Showing {len(view):,} of {len(frame):,} events matching the sidebar filters.")
+    return view
+
+
+def show_event_table(frame, key, page_sizes=(25, 50, 100, 250)):
+    """Paginated table of ``frame`` with a chunked download of all its rows.
+
+    Sorting, searching and slicing run here, and only the visible page is
+    sent to the browser. ``key`` keeps the widgets of several tables apart.
+    """
+    columns = [c for c in frame.columns if c != 'geometry']
+    page_key = f"{key}_page"
+
+    def first_page():
+        st.session_state[page_key] = 1
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        search = st.text_input(
+            "Search", key=f"{key}_search", on_change=first_page,
+            placeholder="Actor, admin area, location...",
+        )
+    with col2:
+        sort_by = st.selectbox(
+            "Sort by", columns, key=f"{key}_sort", on_change=first_page,
+            index=columns.index('event_date') if 'event_date' in columns else 0,
+        )
+    with col3:
+        descending = st.toggle("Descending", key=f"{key}_descending", on_change=first_page)
+    with col4:
+        page_size = st.selectbox("Rows", page_sizes, key=f"{key}_page_size", on_change=first_page)
+
+    with instrument.stage("table") as s:
+        positions = table_rows(frame, sort_by, descending, search.strip())
+        s.rows = len(positions)
+    n_pages = max(1, -(-len(positions) // page_size))
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages  # the sidebar filters shrank the table
+    page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, key=page_key)
+
+    st.dataframe(table_page(frame, positions, page - 1, page_size), hide_index=True)
+    first = (page - 1) * page_size
+    st.caption(
+        f"Rows {min(first + 1, len(positions)):,}–{min(first + page_size, len(positions)):,} "
+        f"of {len(positions):,}" + (f" matching \"{search.strip()}\"" if search.strip() else "") + "."
+    )
+
+    handle = st.session_state.get("dataset")
+    base_name = "acled_events"
+    if handle is not None:
+        base_name = "acled_" + "_".join(str(part).replace("/", "_") for part in handle.dataset.key)
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        fmt = st.radio("Export format", list(FORMATS), horizontal=True, key=f"{key}_format")
+    with col2:
+        extension, mime = FORMATS[fmt]
+        # The file is only written when the button is clicked, chunk by chunk.
+        st.download_button(
+            f"Download all {len(frame):,} events",
+            data=lambda: export_events(frame, fmt),
+            file_name=f"{base_name}.{extension}",
+            mime=mime,
+            on_click="ignore",
+            key=f"{key}_download",
+        )
+
+
+def show_metrics_panel(limit=50):
+    """Collapsible sidebar panel with the latest pipeline stage timings.
+
+    Call it at the end of a page so it includes the stages of this run.
+    """
+    with st.sidebar.expander("⏱️ Pipeline metrics"):
+        capture = instrument.capture_settings()
+        profile = st.checkbox(
+            "Capture cProfile", value=capture["profile"],
+            help="Profile every stage (process-wide; slows the app down).",
+        )
+        memory = st.checkbox(
+            "Trace allocations", value=capture["tracemalloc"],
+            help="Per-stage allocation peak with tracemalloc (process-wide, so approximate "
+                 "when stages overlap; slows the app down).",
+        )
+        instrument.set_capture(profile=profile, memory=memory)
+
+        records = instrument.recent(limit)
+        if not records:
+            st.caption("No stages recorded yet.")
+            return
+        st.dataframe(
+            pd.DataFrame({
+                "stage": [r.name for r in records],
+                "seconds": [round(r.seconds, 3) for r in records],
+                "rows": [r.rows for r in records],
+                "bytes": [format_bytes(r.bytes) if r.bytes else "" for r in records],
+                "peak": [format_bytes(r.peak_bytes) if r.peak_bytes else "" for r in records],
+                "labels": [", ".join(f"{k}={v}" for k, v in r.labels.items()) for r in records],
+            }),
+            hide_index=True,
+        )
+
+        profiled = [r for r in records if r.profile]
+        if profiled:
+            chosen = st.selectbox(
+                "Profile", range(len(profiled)),
+                format_func=lambda i: f"{profiled[i].name} ({profiled[i].seconds:.2f} s)",
+            )
+            st.code(profiled[chosen].profile, language=None)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "JSON lines", instrument.to_jsonl(instrument.recent()),
+                file_name="acled_stages.jsonl", mime="application/jsonl",
+            )
+        with col2:
+            st.download_button(
+                "Prometheus", instrument.to_prometheus(instrument.totals()),
+                file_name="acled_stages.prom", mime="text/plain",
+            )
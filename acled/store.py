@@ -0,0 +1,245 @@
+"""Persistent on-disk cache of ACLED events, partitioned by country and month.
+
+Events live in a SQLite file so they survive restarts. Each ``(iso, month)``
+partition records when it was fetched, the last day it covers and when it
+was last read, which drives both delta refresh (only missing or stale months
+go back to ACLED) and size-based LRU eviction.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pandas as pd
+
+from acled.instrument import stage
+
+CACHE_DIR = os.getenv("ACLED_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache"))
+MAX_BYTES = int(float(os.getenv("ACLED_CACHE_MAX_MB", "512")) * 1024 ** 2)
+
+# A month keeps changing at ACLED for a while after it ends (late reports,
+# revisions). Partitions fetched before the month had settled are refetched
+# once they are older than STALE_AFTER.
+SETTLE_DAYS = 90
+STALE_AFTER = 7 * 24 * 3600
+
+# ACLED access tier: events become available 12 months after they happen, so
+# the month containing the cutoff is only partly published when it is fetched.
+LAG_DAYS = 365
+
+_write_lock = threading.Lock()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+
+
+def month_range(start_date, end_date):
+    """Return the ``YYYY-MM`` months touched by an inclusive date range."""
+    return list(pd.period_range(start_date, end_date, freq="M").strftime("%Y-%m"))
+
+
+def lag_cutoff(now=None):
+    """The last ``YYYY-MM-DD`` date whose events are available at ``now``."""
+    today = datetime.date.fromtimestamp(now or time.time())
+    return (today - datetime.timedelta(days=LAG_DAYS)).strftime("%Y-%m-%d")
+
+
+def month_end(month):
+    return pd.Period(month, freq="M").end_time.strftime("%Y-%m-%d")
+
+
+def contiguous_runs(months):
+    """Group sorted ``YYYY-MM`` months into ``(first, last)`` consecutive runs."""
+    runs = []
+    for month in months:
+        period = pd.Period(month, freq="M")
+        if runs and pd.Period(runs[-1][1], freq="M") + 1 == period:
+            runs[-1][1] = month
+        else:
+            runs.append([month, month])
+    return [tuple(run) for run in runs]
+
+
+class EventStore:
+    def __init__(self, path=None, max_bytes=MAX_BYTES, stale_after=STALE_AFTER):
+        self.path = path or os.path.join(CACHE_DIR, "acled_events.sqlite")
+        self.max_bytes = max_bytes
+        self.stale_after = stale_after
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS partitions ("
+                " iso INTEGER, part_month TEXT, fetched_at REAL, last_used REAL,"
+                " n_rows INTEGER, n_bytes INTEGER, covered_to TEXT, PRIMARY KEY (iso, part_month))"
+            )
+            columns = {row[1] for row in con.execute("PRAGMA table_info(partitions)")}
+            if "covered_to" not in columns:
+                # Stores written before coverage was recorded; see _covered_to.
+                con.execute("ALTER TABLE partitions ADD COLUMN covered_to TEXT")
+
+    @contextmanager
+    def _connect(self):
+        """A connection that commits (or rolls back) on exit and is then closed."""
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _has_events_table(self, con):
+        return con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='events'"
+        ).fetchone() is not None
+
+    @staticmethod
+    def _covered_to(month, fetched_at, covered_to):
+        if covered_to is None:
+            # Older partitions covered whatever the access lag allowed then.
+            covered_to = lag_cutoff(fetched_at)
+        return min(covered_to, month_end(month))
+
+    def _is_stale(self, month, fetched_at, covered_to, end_date, now):
+        """Whether a stored partition must be fetched again for a query ending ``end_date``.
+
+        A partition is stale when the query needs days past the ones it
+        covered and the access lag now makes more of them available, or when
+        it was fetched before the month settled and is older than
+        ``stale_after``.
+        """
+        needed_to = min(month_end(month), end_date, lag_cutoff(now))
+        if self._covered_to(month, fetched_at, covered_to) < needed_to:
+            return True
+        settled_at = (pd.Period(month, freq="M").end_time + pd.Timedelta(days=SETTLE_DAYS)).timestamp()
+        return fetched_at < settled_at and now - fetched_at > self.stale_after
+
+    def plan(self, iso, start_date, end_date, now=None):
+        """Split the months of a query into ``(cached, missing, stale)`` lists."""
+        now = now or time.time()
+        months = month_range(start_date, end_date)
+        with self._connect() as con:
+            stored = {
+                month: (fetched_at, covered_to)
+                for month, fetched_at, covered_to in con.execute(
+                    "SELECT part_month, fetched_at, covered_to FROM partitions"
+                    " WHERE iso = ? AND part_month BETWEEN ? AND ?",
+                    (iso, months[0], months[-1]),
+                ).fetchall()
+            }
+        cached, missing, stale = [], [], []
+        for month in months:
+            if month not in stored:
+                missing.append(month)
+            elif self._is_stale(month, *stored[month], end_date, now):
+                stale.append(month)
+            else:
+                cached.append(month)
+        return cached, missing, stale
+
+    def write(self, iso, months, df, covered_to=None):
+        """Replace the given month partitions with the rows of ``df``.
+
+        Months with no rows in ``df`` are stored as empty partitions so they
+        count as cached. ``covered_to`` is the last day ``df`` is complete
+        for (default: the access-lag cutoff now); a month ending after it is
+        refetched once a query needs the rest of it.
+        """
+        now = time.time()
+        covered_to = covered_to or lag_cutoff(now)
+        part_month = df['event_date'].astype(str).str[:7] if df is not None else None
+        with _write_lock, self._connect() as con:
+            for month in months:
+                chunk = df[part_month == month] if df is not None else None
+                if self._has_events_table(con):
+                    con.execute("DELETE FROM events WHERE iso = ? AND part_month = ?", (iso, month))
+                n_rows = n_bytes = 0
+                if chunk is not None and not chunk.empty:
+                    chunk = chunk.assign(iso=iso, part_month=month)
+                    chunk.to_sql("events", con, if_exists="append", index=False)
+                    n_rows = len(chunk)
+                    n_bytes = int(chunk.memory_usage(deep=True).sum())
+                con.execute(
+                    "INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (iso, month, now, now, n_rows, n_bytes, min(covered_to, month_end(month))),
+                )
+            if self._has_events_table(con):
+                con.execute("CREATE INDEX IF NOT EXISTS events_partition ON events (iso, part_month)")
+
+    def read(self, iso, start_date, end_date):
+        """Return the stored events for an inclusive date range, in date order."""
+        months = month_range(start_date, end_date)
+        with self._connect() as con:
+            con.execute(
+                "UPDATE partitions SET last_used = ? WHERE iso = ? AND part_month BETWEEN ? AND ?",
+                (time.time(), iso, months[0], months[-1]),
+            )
+            if not self._has_events_table(con):
+                return None
+            df = pd.read_sql_query(
+                "SELECT * FROM events WHERE iso = ? AND part_month BETWEEN ? AND ?"
+                " AND event_date BETWEEN ? AND ? ORDER BY event_date",
+                con,
+                params=(iso, months[0], months[-1], start_date, end_date),
+            )
+        if df.empty:
+            return None
+        return df.drop(columns=['iso', 'part_month'])
+
+    def size_bytes(self):
+        with self._connect() as con:
+            return con.execute("SELECT COALESCE(SUM(n_bytes), 0) FROM partitions").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used partitions until the store fits ``max_bytes``."""
+        with _write_lock, self._connect() as con:
+            total = con.execute("SELECT COALESCE(SUM(n_bytes), 0) FROM partitions").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            evicted = 0
+            has_events = self._has_events_table(con)
+            for iso, month, n_bytes in con.execute(
+                "SELECT iso, part_month, n_bytes FROM partitions ORDER BY last_used"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                if has_events:
+                    con.execute("DELETE FROM events WHERE iso = ? AND part_month = ?", (iso, month))
+                con.execute("DELETE FROM partitions WHERE iso = ? AND part_month = ?", (iso, month))
+                total -= n_bytes
+                evicted += 1
+        with self._connect() as con:
+            con.execute("PRAGMA incremental_vacuum")
+        return evicted
+
+
+def load_events(store, iso, start_date, end_date, fetch_range):
+    """Answer a query from ``store``, fetching only missing or stale months.
+
+    ``fetch_range(start, end)`` must return the events for an inclusive date
+    range (or ``None``). Whole months are always fetched; the month holding
+    the access-lag cutoff is stored as covered up to it and refetched once a
+    later cutoff is queried. Returns ``(df, CacheStats)``; ``df`` is ``None`` when empty.
+    """
+    cached, missing, stale = store.plan(iso, start_date, end_date)
+    for first, last in contiguous_runs(sorted(missing + stale)):
+        run_start = pd.Period(first, freq="M").start_time.strftime("%Y-%m-%d")
+        run_end = pd.Period(last, freq="M").end_time.strftime("%Y-%m-%d")
+        df = fetch_range(run_start, run_end)
+        with stage("cache_write", iso=iso) as s:
+            s.rows = 0 if df is None else len(df)
+            store.write(iso, month_range(run_start, run_end), df)
+
+    with stage("cache_read", iso=iso) as s:
+        df = store.read(iso, start_date, end_date)
+        s.rows = 0 if df is None else len(df)
+    store.evict()
+    return df, CacheStats(hits=len(cached), misses=len(missing), stale=len(stale))
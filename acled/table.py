@@ -0,0 +1,71 @@
+"""Server-side sorting, searching and paging of an event frame.
+
+A table view only ever sends one page of rows to the browser. The sort
+order of each column is an ``argsort`` computed once per frame; a search
+matches the text against the categories of the string columns (a few
+thousand values) rather than against every row, and the matching rows are
+kept for the most recent ``MAX_SEARCHES`` searches. A page is then a slice
+of positions, and only those rows are copied out of the frame.
+"""
+import numpy as np
+import pandas as pd
+
+from acled.memo import frame_lru, frame_memo
+
+SEARCH_COLUMNS = (
+    "event_id_cnty", "actor1", "actor2", "country", "admin1", "admin2", "admin3", "location",
+)
+MAX_SEARCHES = 8
+
+
+def sort_order(frame, column):
+    """Row positions of ``frame`` ordered by ``column`` (ascending, missing last)."""
+    def compute():
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Categories are sorted when the frame is compacted.
+            keys = values.cat.codes.to_numpy().astype('int64')
+            keys[keys < 0] = len(values.cat.categories)
+            return np.argsort(keys, kind='stable')
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            return np.argsort(values.to_numpy(), kind='stable')  # NaN/NaT last
+        return np.argsort(values.astype(str).to_numpy(), kind='stable')
+
+    return frame_memo(frame, ("table_order", column), compute)
+
+
+def search_rows(frame, text):
+    """Positions of the rows where any of ``SEARCH_COLUMNS`` contains ``text``."""
+    def compute():
+        match = np.zeros(len(frame), dtype=bool)
+        for column in SEARCH_COLUMNS:
+            if column not in frame:
+                continue
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                hits = values.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+                # Code -1 (missing) picks the trailing False.
+                match |= np.append(np.asarray(hits, dtype=bool), False)[values.cat.codes.to_numpy()]
+            else:
+                match |= values.astype(str).str.contains(text, case=False, regex=False).to_numpy()
+        return np.flatnonzero(match)
+
+    return frame_lru(frame, ("table_searches",), text, compute, MAX_SEARCHES)
+
+
+def table_rows(frame, sort_by=None, descending=False, search=""):
+    """Positions of the rows to list, in display order."""
+    order = sort_order(frame, sort_by) if sort_by else np.arange(len(frame))
+    if descending:
+        order = order[::-1]
+    if search:
+        selected = np.zeros(len(frame), dtype=bool)
+        selected[search_rows(frame, search)] = True
+        order = order[selected[order]]
+    return order
+
+
+def table_page(frame, positions, page, page_size, drop=("geometry",)):
+    """Rows ``page`` (0-based) of ``positions`` as a frame, without ``drop`` columns."""
+    rows = frame.take(positions[page * page_size:(page + 1) * page_size])
+    return pd.DataFrame(rows.drop(columns=[c for c in drop if c in rows]))
@@ -0,0 +1,143 @@
+"""Viewport queries over the loaded events, for a map that only receives what is visible.
+
+A ``GridIndex`` sorts points by the cell of a fixed grid over their extent,
+so the points inside a bounding box are one contiguous slice per grid row,
+found with ``searchsorted``; only the cells on the box's edge need an exact
+test. One index is built per event frame and memoized on it.
+
+When a viewport holds more than ``MAX_POINTS`` events, they are sent as
+clusters instead: events binned into squares of ``CELL_PIXELS`` web-mercator
+pixels at the current zoom. Clusters are computed once per frame and zoom
+level and indexed the same way, so a payload stays bounded by the screen
+size, not by the number of events loaded.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from acled.memo import frame_memo
+
+MAX_POINTS = int(os.getenv("ACLED_VIEWPORT_MAX_POINTS", "5000"))
+CELL_PIXELS = 40
+INDEX_CELLS = 256  # grid cells along each side of the index extent
+PAD = 0.25  # fraction of the viewport added on each side, so small pans stay covered
+TILE_PIXELS = 256
+
+
+class GridIndex:
+    def __init__(self, lon, lat, cells=INDEX_CELLS):
+        self.lon = np.asarray(lon, dtype='float64')
+        self.lat = np.asarray(lat, dtype='float64')
+        self.cells = cells
+        if len(self.lon):
+            self.extent = (self.lon.min(), self.lat.min(), self.lon.max(), self.lat.max())
+        else:
+            self.extent = (0.0, 0.0, 0.0, 0.0)
+        minx, miny, maxx, maxy = self.extent
+        self._cell_w = max(maxx - minx, 1e-9) / cells
+        self._cell_h = max(maxy - miny, 1e-9) / cells
+        keys = self._rows(self.lat) * cells + self._cols(self.lon)
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    def _cols(self, lon):
+        return np.clip(((lon - self.extent[0]) / self._cell_w).astype('int64'), 0, self.cells - 1)
+
+    def _rows(self, lat):
+        return np.clip(((lat - self.extent[1]) / self._cell_h).astype('int64'), 0, self.cells - 1)
+
+    def _slices(self, minx, miny, maxx, maxy):
+        """``(lo, hi)`` bounds into the sorted keys of the cells the box touches."""
+        if not len(self._keys) or minx > self.extent[2] or maxx < self.extent[0] \
+                or miny > self.extent[3] or maxy < self.extent[1]:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        c0, c1 = self._cols(np.array([minx, maxx]))
+        r0, r1 = self._rows(np.array([miny, maxy]))
+        rows = np.arange(r0, r1 + 1) * self.cells
+        lo = np.searchsorted(self._keys, rows + c0, 'left')
+        hi = np.searchsorted(self._keys, rows + c1, 'right')
+        return lo, hi
+
+    def estimate(self, minx, miny, maxx, maxy):
+        """Upper bound on the points inside the box, without touching them."""
+        lo, hi = self._slices(minx, miny, maxx, maxy)
+        return int((hi - lo).sum())
+
+    def query(self, minx, miny, maxx, maxy):
+        """Positions of the points inside the box, in ascending order."""
+        lo, hi = self._slices(minx, miny, maxx, maxy)
+        if not len(lo):
+            return np.empty(0, dtype=np.intp)
+        candidates = np.concatenate([self._order[a:b] for a, b in zip(lo, hi)])
+        lon, lat = self.lon[candidates], self.lat[candidates]
+        inside = (lon >= minx) & (lon <= maxx) & (lat >= miny) & (lat <= maxy)
+        return np.sort(candidates[inside])
+
+
+def mercator_pixels(lon, lat, zoom):
+    """Web-mercator pixel coordinates of points at ``zoom``."""
+    scale = TILE_PIXELS * 2.0 ** zoom
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = (np.asarray(lon, dtype='float64') + 180.0) / 360.0 * scale
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * scale
+    return x, y
+
+
+def viewport_index(frame):
+    """The ``GridIndex`` of an event frame, built on first use."""
+    return frame_memo(
+        frame, ("viewport_index",), lambda: GridIndex(frame['longitude'], frame['latitude'])
+    )
+
+
+def zoom_clusters(frame, zoom):
+    """Events binned into ``CELL_PIXELS`` squares at ``zoom``, with their index.
+
+    Each cluster has the event count, summed fatalities and the mean event
+    location (so markers sit on the events, not on the cell corner).
+    """
+    def compute():
+        lon = frame['longitude'].to_numpy(dtype='float64')
+        lat = frame['latitude'].to_numpy(dtype='float64')
+        x, y = mercator_pixels(lon, lat, zoom)
+        per_row = int(TILE_PIXELS * 2 ** zoom // CELL_PIXELS) + 1
+        cells = pd.DataFrame({
+            'cell': (y // CELL_PIXELS).astype('int64') * per_row + (x // CELL_PIXELS).astype('int64'),
+            'longitude': lon,
+            'latitude': lat,
+            'fatalities': frame['fatalities'].to_numpy(dtype='int64'),
+        }).groupby('cell').agg(
+            events=('fatalities', 'size'),
+            fatalities=('fatalities', 'sum'),
+            longitude=('longitude', 'mean'),
+            latitude=('latitude', 'mean'),
+        ).reset_index(drop=True)
+        return cells, GridIndex(cells['longitude'], cells['latitude'])
+
+    return frame_memo(frame, ("viewport_clusters", int(zoom)), compute)
+
+
+def pad_bounds(bounds, pad=PAD):
+    minx, miny, maxx, maxy = bounds
+    dx, dy = (maxx - minx) * pad, (maxy - miny) * pad
+    return minx - dx, miny - dy, maxx + dx, maxy + dy
+
+
+def viewport_events(frame, bounds, zoom, max_points=MAX_POINTS):
+    """What to draw for a viewport: ``("points", rows, n)`` or ``("clusters", cells, n)``.
+
+    ``bounds`` is ``(minx, miny, maxx, maxy)`` in degrees; a margin of
+    ``PAD`` is added around it. ``n`` is the number of events drawn.
+    """
+    bounds = pad_bounds(bounds)
+    index = viewport_index(frame)
+    # The edge cells only overlap the box, so the estimate can overshoot;
+    # exact positions are only gathered when points are likely.
+    if index.estimate(*bounds) <= 2 * max_points:
+        positions = index.query(*bounds)
+        if len(positions) <= max_points:
+            return "points", frame.take(positions), len(positions)
+    cells, cell_index = zoom_clusters(frame, zoom)
+    cells = cells.take(cell_index.query(*bounds))
+    return "clusters", cells, int(cells['events'].sum())
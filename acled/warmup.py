@@ -0,0 +1,361 @@
+"""Headless warm-up of the on-disk caches, for scheduled (e.g. nightly) runs.
+
+    python -m acled.warmup --countries AFG UKR --region "Horn of Africa"
+    python -m acled.warmup --countries Somalia --windows 2023-01-01/2023-12-31 2024-01-01/2024-12-31
+    python -m acled.warmup --config warmup.json --workers 2 --report warmup_report.json
+
+For every country it loads the country mask, the admin boundaries and the
+events of every date window through the same code the pages use, so the app
+then answers from the local event store and boundary files instead of
+ACLED and geoBoundaries. Without ``--windows`` the window is the last
+``--months`` months available under the 12-month access lag; the event
+store keeps the month holding the cutoff as partial, so the next run
+fetches the rest of it.
+
+Countries run in parallel, at most ``--workers`` at a time; ACLED requests
+stay under the client's process-wide cap on top of that. Events are loaded
+a calendar year at a time, and each finished step is appended to a journal
+in the cache directory, one file per day. A rerun the same day (after an
+interruption, say) skips the steps already done; ``--fresh`` ignores the
+journal. A summary is printed at the end and the exit status is 1 if any
+step failed.
+
+A JSON ``--config`` file may hold the same settings as the options::
+
+    {"countries": ["AFG", "UKR"], "regions": ["Sahel (G5)"],
+     "windows": ["2024-01-01/2024-12-31"], "levels": ["ADM1", "ADM2"]}
+"""
+import argparse
+import contextvars
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+
+from acled import instrument
+from acled.boundaries import get_boundaries
+from acled.client import get_client
+from acled.events import load_country_events
+from acled.reference import REGION_PRESETS, get_country_store, read_country_lookup
+from acled.store import CACHE_DIR, LAG_DAYS, EventStore
+
+JOURNAL_DIR = os.path.join(CACHE_DIR, "warmup")
+JOURNAL_DAYS = 30  # older journals are deleted
+
+
+class Interrupted(Exception):
+    pass
+
+
+@dataclass
+class StepResult:
+    country: str
+    step: str
+    status: str  # "done", "skipped" (done by an earlier run) or "failed"
+    rows: int = 0
+    fetched_months: int = 0
+    cached_months: int = 0
+    seconds: float = 0.0
+    error: str = None
+
+
+@dataclass
+class Plan:
+    countries: dict = field(default_factory=dict)  # ISO3 -> ISO numeric
+    windows: list = field(default_factory=list)  # (start, end) as YYYY-MM-DD
+    levels: list = field(default_factory=lambda: ["ADM1"])
+    shard_by: str = None
+
+
+def default_window(months, today=None):
+    """The last ``months`` months, the last one ending at the access-lag cutoff."""
+    cutoff = (today or datetime.date.today()) - datetime.timedelta(days=LAG_DAYS)
+    first = pd.Period(cutoff, freq="M") - (months - 1)
+    return first.start_time.strftime("%Y-%m-%d"), cutoff.strftime("%Y-%m-%d")
+
+
+def parse_window(text):
+    start, sep, end = text.partition("/")
+    if not sep:
+        raise ValueError(f"Date window must be START/END, got {text!r}")
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start > end:
+        raise ValueError(f"Date window starts after it ends: {text!r}")
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def split_by_year(start, end):
+    """Cut a window at year boundaries, so an interrupted run loses at most a year's fetch."""
+    years = range(int(start[:4]), int(end[:4]) + 1)
+    return [(max(start, f"{year}-01-01"), min(end, f"{year}-12-31")) for year in years]
+
+
+def resolve_countries(names, regions, lookup):
+    """ISO3 -> ISO numeric for country names or ISO3 codes and region presets."""
+    by_iso3 = {entry['alpha3']: entry['country_code'] for entry in lookup.values()}
+    by_name = {name.casefold(): entry['alpha3'] for name, entry in lookup.items()}
+    countries = {}
+    for region in regions:
+        if region not in REGION_PRESETS:
+            raise ValueError(f"Unknown region {region!r}; choose from {', '.join(REGION_PRESETS)}")
+        names = [*REGION_PRESETS[region], *names]
+    for name in names:
+        if name.upper() in by_iso3:
+            iso3 = name.upper()
+        elif name.casefold() in by_name:
+            iso3 = by_name[name.casefold()]
+        else:
+            raise ValueError(f"Unknown country {name!r}")
+        countries[iso3] = by_iso3[iso3]
+    return dict(sorted(countries.items()))
+
+
+class Journal:
+    """Append-only record of finished steps, one JSON line each."""
+
+    def __init__(self, path, fresh=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = {}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by the interruption
+                    if entry["status"] == "done":
+                        self.done[(entry["country"], entry["step"])] = entry
+
+    @classmethod
+    def for_today(cls, directory=JOURNAL_DIR, fresh=False):
+        cutoff = time.time() - JOURNAL_DAYS * 24 * 3600
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.startswith("journal-") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+        return cls(os.path.join(directory, f"journal-{datetime.date.today():%Y-%m-%d}.jsonl"), fresh)
+
+    def record(self, result):
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(asdict(result)) + "\n")
+
+
+def _steps(iso3, iso, plan, store, client, stop):
+    """``(name, run)`` pairs for one country; ``run()`` returns a ``StepResult``."""
+    def check(_rows=None):
+        if stop.is_set():
+            raise Interrupted()
+
+    def mask():
+        countries = get_country_store()
+        # The page centres countries without a geometry on their events instead.
+        rows = len(countries.mask(iso3)) if iso3 in countries else 0
+        return StepResult(iso3, "mask", "done", rows=rows)
+
+    def boundaries(level):
+        return lambda: StepResult(iso3, f"boundaries {level}", "done", rows=len(get_boundaries(iso3, level)))
+
+    def events(start, end):
+        def run():
+            df, stats = load_country_events(
+                store, client, iso, iso3, start, end, shard_by=plan.shard_by, on_progress=check,
+            )
+            return StepResult(
+                iso3, f"events {start}/{end}", "done", rows=0 if df is None else len(df),
+                fetched_months=stats.misses + stats.stale, cached_months=stats.hits,
+            )
+        return run
+
+    return [
+        ("mask", mask),
+        *((f"boundaries {level}", boundaries(level)) for level in plan.levels),
+        *(
+            (f"events {start}/{end}", events(start, end))
+            for window in plan.windows for start, end in split_by_year(*window)
+        ),
+    ]
+
+
+def warm_country(iso3, iso, plan, store, client, journal, stop, report):
+    """Run the steps of one country in order, skipping those in ``journal``."""
+    results = []
+    for name, run in _steps(iso3, iso, plan, store, client, stop):
+        if stop.is_set():
+            break
+        earlier = journal.done.get((iso3, name))
+        if earlier is not None:
+            result = StepResult(earlier["country"], name, "skipped", rows=earlier["rows"])
+        else:
+            start = time.perf_counter()
+            try:
+                with instrument.stage("warmup", iso3=iso3, step=name.split()[0]):
+                    result = run()
+            except Interrupted:
+                break
+            except Exception as e:
+                result = StepResult(iso3, name, "failed", error=f"{type(e).__name__}: {e}")
+            result.seconds = time.perf_counter() - start
+            journal.record(result)
+        results.append(result)
+        report(result)
+    return results
+
+
+def run(plan, store, client, journal, workers=4):
+    """Warm every country of ``plan``; returns ``(results, interrupted)``."""
+    stop = threading.Event()
+    n_parts = sum(len(split_by_year(*window)) for window in plan.windows)
+    total = len(plan.countries) * (1 + len(plan.levels) + n_parts)
+    finished = [0]
+    print_lock = threading.Lock()
+
+    def report(result):
+        with print_lock:
+            finished[0] += 1
+            detail = f"{result.rows:,} rows"
+            if result.step.startswith("events") and result.status == "done":
+                detail += f", {result.fetched_months} month(s) fetched, {result.cached_months} cached"
+            if result.status == "failed":
+                detail = result.error
+            print(f"[{finished[0]:>{len(str(total))}}/{total}] {result.country} {result.step}: "
+                  f"{result.status} ({detail}, {result.seconds:.1f} s)", flush=True)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="acled-warmup")
+    futures = [
+        pool.submit(
+            contextvars.copy_context().run, warm_country,
+            iso3, iso, plan, store, client, journal, stop, report,
+        )
+        for iso3, iso in plan.countries.items()
+    ]
+    interrupted = False
+    try:
+        for _ in as_completed(futures):
+            pass
+    except KeyboardInterrupt:
+        # Running steps stop at their next ACLED page; finished ones are
+        # already in the journal.
+        interrupted = True
+        stop.set()
+        print("Interrupted; waiting for running steps to stop...", flush=True)
+    pool.shutdown(wait=True, cancel_futures=True)
+    results = [
+        result
+        for future in futures if future.done() and not future.cancelled()
+        for result in future.result()
+    ]
+    return results, interrupted
+
+
+def summarize(results):
+    """Per-country totals as a DataFrame, one row per country."""
+    frame = pd.DataFrame([asdict(r) for r in results], columns=list(StepResult.__dataclass_fields__))
+    events = frame['step'].str.startswith("events")
+    summary = frame.assign(
+        events=frame['rows'].where(events, 0),
+        done=frame['status'].eq("done"),
+        skipped=frame['status'].eq("skipped"),
+        failed=frame['status'].eq("failed"),
+    ).groupby('country').agg(
+        steps=('step', 'size'), done=('done', 'sum'), skipped=('skipped', 'sum'),
+        failed=('failed', 'sum'), events=('events', 'sum'),
+        fetched_months=('fetched_months', 'sum'), cached_months=('cached_months', 'sum'),
+        seconds=('seconds', 'sum'),
+    )
+    return summary.round({'seconds': 1})
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", help="JSON file with countries, regions, windows and levels")
+    parser.add_argument("--countries", nargs="+", default=[], help="ISO3 codes or country names")
+    parser.add_argument("--region", action="append", default=[], choices=list(REGION_PRESETS),
+                        help="add the countries of a region preset (repeatable)")
+    parser.add_argument("--windows", nargs="+", default=[], help="date windows as START/END")
+    parser.add_argument("--months", type=int, default=12,
+                        help="without --windows: warm this many months up to the access-lag cutoff")
+    parser.add_argument("--levels", nargs="+", help="admin boundary levels (default: ADM1)")
+    parser.add_argument("--shard-by", choices=["month", "quarter"], help="fetch long windows as parallel shards")
+    parser.add_argument("--workers", type=int, default=4, help="countries warmed at the same time")
+    parser.add_argument("--fresh", action="store_true", help="ignore today's journal and redo every step")
+    parser.add_argument("--report", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    try:
+        countries = resolve_countries(
+            [*config.get("countries", []), *args.countries],
+            [*config.get("regions", []), *args.region],
+            read_country_lookup(),
+        )
+        windows = [parse_window(w) for w in [*config.get("windows", []), *args.windows]]
+    except ValueError as e:
+        parser.error(str(e))
+    if not countries:
+        parser.error("no countries given; use --countries, --region or --config")
+
+    load_dotenv()
+    email, password = os.getenv("ACLED_EMAIL"), os.getenv("ACLED_PASSWORD")
+    if not email or not password:
+        parser.error("ACLED_EMAIL and ACLED_PASSWORD must be set in the environment or .env")
+
+    plan = Plan(
+        countries=countries,
+        windows=windows or [default_window(args.months)],
+        levels=args.levels or config.get("levels") or ["ADM1"],
+        shard_by=args.shard_by or config.get("shard_by"),
+    )
+    journal = Journal.for_today(fresh=args.fresh)
+    print(f"Warming {len(plan.countries)} countries x {len(plan.windows)} window(s), "
+          f"levels {', '.join(plan.levels)}; journal {journal.path}", flush=True)
+
+    started = time.time()
+    results, interrupted = run(plan, EventStore(), get_client(email, password), journal, args.workers)
+
+    if results:
+        print()
+        print(summarize(results).to_string())
+    failed = [r for r in results if r.status == "failed"]
+    for result in failed:
+        print(f"FAILED {result.country} {result.step}: {result.error}")
+    print(f"\n{sum(r.status == 'done' for r in results)} step(s) done, "
+          f"{sum(r.status == 'skipped' for r in results)} skipped (already done today), "
+          f"{len(failed)} failed in {time.time() - started:.1f} s.")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({
+                "started": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+                "seconds": round(time.time() - started, 3),
+                "interrupted": interrupted,
+                "countries": list(plan.countries),
+                "windows": [f"{start}/{end}" for start, end in plan.windows],
+                "levels": plan.levels,
+                "steps": [asdict(r) for r in results],
+                "stages": instrument.totals(),
+            }, f, indent=2)
+
+    if interrupted:
+        print("Run the same command again to resume.")
+        return 130
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
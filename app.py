@@ -1,5 +1,4 @@
 import streamlit as st
-import leafmap.foliumap as leafmap
 
 st.set_page_config(layout="wide")
 
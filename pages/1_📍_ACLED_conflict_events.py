@@ -1,14 +1,28 @@
 import streamlit as st
-import geopandas as gpd
 import pandas as pd
-import requests
-from shapely.geometry import Point
+import contextvars
+import importlib.util
 import os
-import leafmap.foliumap as leafmap
-import folium
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from acled.boundaries import prefetch as prefetch_boundaries
+from acled.client import get_client
+from acled.cube import TimeCube
+from acled.events import load_country_events
+from acled.frame import to_geodataframe
+from acled.instrument import stage
+from acled.jobs import DONE
+from acled.reference import REGION_PRESETS, get_country_store, read_country_lookup
+from acled.schema import compact, concat_events, format_bytes
+from acled.session import (
+    filter_events, finish_fetch, follow_fetch, get_dataset_registry, show_event_table,
+    show_fetch_outcome, show_metrics_panel, start_fetch,
+)
+from acled.store import LAG_DAYS, EventStore
+
 # ── Environment ────────────────────────────────────────────────────────────
 load_dotenv()
 email = os.getenv("ACLED_EMAIL")
@@ -21,187 +35,117 @@ if not email or not password:
 # ── Page config ────────────────────────────────────────────────────────────
 st.title("Conflict Data Explorer")
 
+# Countries of a region loaded at the same time (each may shard further).
+MAX_PARALLEL_COUNTRIES = 4
+# The fetch preview redraws every second, so it only shows the latest events.
+PREVIEW_ROWS = 2000
+PREVIEW_TABLE_ROWS = 1000
+
 # ── Cached helpers ─────────────────────────────────────────────────────────
 @st.cache_data
 def load_country_dict():
-    world = pd.read_json(
-        'https://raw.githubusercontent.com/lukes/ISO-3166-Countries-with-Regional-Codes'
-        '/refs/heads/master/all/all.json'
-    )
-    return {
-        row['name']: {
-            'alpha3': row['alpha-3'],
-            'country_code': row['country-code']
-        }
-        for _, row in world.iterrows()
-    }
-
-@st.cache_data
-def load_acled_names():
-    return pd.read_csv(
-        'https://raw.githubusercontent.com/oscarbau/streamlit_template'
-        '/refs/heads/dashboards/data/acled_iso_codes.csv',
-        delimiter=';'
-    )
-
-@st.cache_data(ttl=3600)  # refresh token every hour
-def get_access_token(email, password):
-    """Get OAuth2 Bearer token from ACLED."""
-    response = requests.post(
-        "https://acleddata.com/oauth/token",
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-        data={
-            "username": email,
-            "password": password,
-            "grant_type": "password",
-            "client_id": "acled"
-        }
-    )
-    if response.status_code == 200:
-        return response.json()["access_token"]
-    else:
-        raise Exception(f"Failed to get token: {response.status_code} {response.text}")
-
-@st.cache_data
-def get_mask_for_iso3(iso3):
-    url = "https://raw.githubusercontent.com/datasets/geo-countries/master/data/countries.geojson"
-    countries = gpd.read_file(url)
-    country_mask = countries[countries['ISO3166-1-Alpha-3'] == iso3]
-    if country_mask.empty:
-        raise ValueError(f"No country found with ISO3 code: {iso3}")
-    return country_mask
-
-@st.cache_data(ttl=1800)  # refresh data every 30 min
-def fetch_conflict_data(period, iso, iso3):
-    """Pure data fetching — no st.* calls so caching works safely."""
+    """Country name -> ISO3, ISO numeric and ACLED name, from the bundled table."""
+    return read_country_lookup()
+
+@st.cache_resource
+def get_event_store():
+    """One on-disk event store per process, shared by all sessions."""
+    return EventStore()
+
+def fetch_conflict_data(period, iso, iso3, shard_by=None, on_progress=None, on_cache=None,
+                        on_chunk=None):
+    """Load events for ``period``, fetching from ACLED only what the store lacks.
+
+    Months already in the local event store are read from disk; missing or
+    stale months are fetched page by page, reporting the running row count to
+    ``on_progress`` and each converted page to ``on_chunk``. ``shard_by``
+    ("month" or "quarter") fetches them as parallel date shards.
+    ``on_cache`` receives the store's ``CacheStats``.
+    """
     start_date_str, end_date_str = period.split('/')
     start_date = pd.to_datetime(start_date_str).strftime("%Y-%m-%d")
     end_date = pd.to_datetime(end_date_str).strftime("%Y-%m-%d")
 
-    token = get_access_token(email, password)
-
-    params = {
-        "iso": iso,
-        "limit": 0,
-        "event_date": f"{start_date}|{end_date}",
-        "event_date_where": "BETWEEN",
-        "_format": "json"
-    }
-
-    response = requests.get(
-        "https://acleddata.com/api/acled/read",
-        params=params,
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+    df, cache_stats = load_country_events(
+        get_event_store(), get_client(email, password), iso, iso3, start_date, end_date,
+        shard_by=shard_by, on_progress=on_progress, on_chunk=on_chunk,
     )
+    if on_cache is not None:
+        on_cache(cache_stats)
 
-    if response.status_code != 200:
-        raise Exception(f"ACLED API request failed: {response.status_code}")
-
-    data = response.json()
-
-    if 'data' not in data:
-        raise Exception("No 'data' key in ACLED API response.")
-
-    if data.get("count", 0) == 0:
+    if df is None:
         return None  # caller handles empty result
 
-    all_data = []
-    for record in data['data']:
-        event_date = record.get('event_date', '')
-        year, month, day = (event_date.split('-') + [None, None, None])[:3]
-        all_data.append({
-            'event_id_cnty': record.get('event_id_cnty'),
-            'event_date': event_date,
-            'year': int(year) if year else None,
-            'month': int(month) if month else None,
-            'day': int(day) if day else None,
-            'actor1': record.get('actor1'),
-            'actor2': record.get('actor2'),
-            'interaction': record.get('interaction'),
-            'country': record.get('country'),
-            'admin1': record.get('admin1'),
-            'admin2': record.get('admin2'),
-            'admin3': record.get('admin3'),
-            'location': record.get('location'),
-            'fatalities': int(record.get('fatalities', 0)),
-            'latitude': float(record.get('latitude', 0)),
-            'longitude': float(record.get('longitude', 0)),
-            'geo_precision': record.get('geo_precision')
-        })
-
-    print(f"{len(all_data)} events fetched for {start_date} to {end_date}")
-
-    df = pd.DataFrame(all_data)
-    df['event_date'] = pd.to_datetime(df['event_date'], format="%Y-%m-%d", errors='coerce')
-
-    geometry = [Point(xy) for xy in zip(df['longitude'], df['latitude'])]
-    gdf = gpd.GeoDataFrame(df, geometry=geometry, crs='EPSG:4326')
-
-    mask_gdf = get_mask_for_iso3(iso3).to_crs(gdf.crs)
-    centroid = mask_gdf.geometry.unary_union.centroid
-    center_latlon = [centroid.y, centroid.x]
+    with stage("geometry", iso3=iso3) as s:
+        gdf = compact(to_geodataframe(df))
+        s.rows = len(gdf)
 
     if gdf.empty:
         return None
 
-    gdf['event_date'] = gdf['event_date'].dt.strftime('%Y-%m-%d')
+    with stage("country_lookup", iso3=iso3):
+        center_latlon = get_country_store().center(iso3, gdf)
 
-    return gdf, center_latlon, df
+    return gdf, center_latlon
 
 
 # ── Load reference data ────────────────────────────────────────────────────
 country_dict = load_country_dict()
-acled_names = load_acled_names()
-code_to_acled_name = dict(zip(acled_names['ISO Codes'], acled_names['Country']))
-
-for name, data in country_dict.items():
-    code = data.get("country_code")
-    data["acled_name"] = code_to_acled_name.get(code)
 
 
 # ── UI ─────────────────────────────────────────────────────────────────────
-col1, col2, col3 = st.columns(3)
+names_by_iso3 = {entry['alpha3']: name for name, entry in country_dict.items()}
+
+
+def apply_region():
+    """Replace the country selection with the chosen region preset."""
+    preset = REGION_PRESETS.get(st.session_state["region_preset"])
+    if preset:
+        st.session_state.selected_countries = [
+            names_by_iso3[iso3] for iso3 in preset if iso3 in names_by_iso3
+        ]
+
+
+col1, col2 = st.columns([1, 2])
 
 with col1:
-    current_selection = st.selectbox(
-        "Select a country",
+    st.selectbox("Region preset", ["Custom", *REGION_PRESETS], key="region_preset", on_change=apply_region)
+
+# Changing countries keeps the loaded data: every country's events stay in
+# the shared registry and the local store, so switching back is cheap.
+with col2:
+    selected_countries = st.multiselect(
+        "Select countries",
         sorted(country_dict.keys()),
-        index=sorted(country_dict.keys()).index(
-            st.session_state.get("selected_country", sorted(country_dict.keys())[0])
-        )
+        default=st.session_state.get("selected_countries", [sorted(country_dict.keys())[0]]),
     )
+st.session_state.selected_countries = selected_countries
+if not selected_countries:
+    st.info("Select at least one country.")
+    st.stop()
 
-# Clear state if country changed
-if (
-    "selected_country" in st.session_state
-    and current_selection != st.session_state.selected_country
-):
-    keys_to_keep = {"selected_country"}
-    for key in list(st.session_state.keys()):
-        if key not in keys_to_keep:
-            del st.session_state[key]
-    st.session_state.selected_country = current_selection
-    st.rerun()
-
-st.session_state.selected_country = current_selection
-selected_country = current_selection
-selected_iso3 = country_dict[selected_country]['alpha3']
-selected_iso_num = country_dict[selected_country]['country_code']
-
-# Define the 12-month lag cutoff
-lag_cutoff = datetime.date.today() - datetime.timedelta(days=365)
+selected_country = ", ".join(selected_countries)
+selected_iso3s = tuple(sorted(country_dict[name]['alpha3'] for name in selected_countries))
+iso_by_iso3 = {
+    country_dict[name]['alpha3']: country_dict[name]['country_code'] for name in selected_countries
+}
 
-with col2:
+# Warm the admin1 page's boundaries while the user picks dates and fetches.
+for iso3 in selected_iso3s:
+    prefetch_boundaries(iso3, "ADM1")
+
+# Define the 12-month lag cutoff (the event store plans refreshes on the same one)
+lag_cutoff = datetime.date.today() - datetime.timedelta(days=LAG_DAYS)
+
+col3, col4 = st.columns(2)
+with col3:
     start_date = st.date_input(
         "Select start date",
         value=st.session_state.get("start_date", datetime.date(2025, 1, 1)),
         min_value=datetime.date(2000, 1, 1),
         max_value=lag_cutoff
     )
-with col3:
+with col4:
     end_date = st.date_input(
         "Select end date",
         value=st.session_state.get("end_date", lag_cutoff),
@@ -215,73 +159,256 @@ st.caption(
 )
 period = f"{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}"
 
+shard_labels = {"No split": None, "By month": "month", "By quarter": "quarter"}
+shard_label = st.radio(
+    "Parallel download",
+    list(shard_labels),
+    horizontal=True,
+    help="Split long periods into date ranges fetched concurrently from ACLED.",
+)
+
 
 # ── Main ───────────────────────────────────────────────────────────────────
+def dataset_key(iso3s, period):
+    """Registry and job key of a selection; a single country keeps its own key."""
+    return ("+".join(iso3s), period)
+
+
+def run_fetch(job, period, countries, shard_by):
+    """Job body: load the dataset into the shared registry (runs off the script thread).
+
+    ``countries`` maps ISO3 to ACLED's numeric code. Each country is loaded
+    under its own registry key, so countries already in memory are reused
+    and the rest are fetched concurrently; a region is registered as the
+    merge of its countries.
+    """
+    registry = get_dataset_registry()
+    iso3s = sorted(countries)
+    cache_stats = job.details.setdefault("cache", {})
+    rows = {}
+    rows_lock = threading.Lock()
+
+    def report(iso3, n_rows):
+        with rows_lock:
+            rows[iso3] = n_rows
+            total = sum(rows.values())
+        job.progress(total)
+
+    def load_country(iso3):
+        def load():
+            result = fetch_conflict_data(
+                period, countries[iso3], iso3, shard_by=shard_by,
+                on_progress=lambda n_rows: report(iso3, n_rows),
+                on_chunk=job.add_chunk,
+                on_cache=lambda stats: cache_stats.update({iso3: stats}),
+            )
+            if result is None:
+                return None
+            gdf, center_latlon = result
+            with stage("cube", iso3=iso3) as s:
+                cube = TimeCube.build(gdf)
+                s.rows = len(gdf)
+            return gdf, center_latlon, cube
+
+        handle = registry.acquire(dataset_key([iso3], period), load)
+        if handle is not None:
+            report(iso3, len(handle.dataset.frame))
+        return handle
+
+    if len(iso3s) == 1:
+        return load_country(iso3s[0])
+
+    def load_region():
+        with ThreadPoolExecutor(
+            max_workers=min(len(iso3s), MAX_PARALLEL_COUNTRIES), thread_name_prefix="acled-country",
+        ) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, load_country, iso3) for iso3 in iso3s]
+            handles = [future.result() for future in futures]
+        handles = [handle for handle in handles if handle is not None]
+        if not handles:
+            return None
+        # The merged frame is a copy, so the countries' datasets are only
+        # pinned until it is built.
+        try:
+            datasets = [handle.dataset for handle in handles]
+            with stage("merge", countries=len(datasets)) as s:
+                gdf = concat_events(dataset.frame for dataset in datasets)
+                s.rows = len(gdf)
+            with stage("cube", iso3="+".join(iso3s)) as s:
+                cube = TimeCube.combine(dataset.cube for dataset in datasets)
+                s.rows = len(gdf)
+        finally:
+            for handle in handles:
+                handle.release()
+        return gdf, get_country_store().region_center(iso3s, gdf), cube
+
+    return registry.acquire(dataset_key(iso3s, period), load_region)
+
+
+def map_zoom(iso3s):
+    return 4 if len(iso3s) == 1 else 3
+
+
+def preview_events(job):
+    """Partial table and map of the latest events received."""
+    import leafmap.foliumap as leafmap
+    from acled.render import add_event_layer
+
+    partial = job.recent(PREVIEW_ROWS)
+    if partial is None:
+        return
+    gdf = compact(to_geodataframe(partial))
+    iso3s = job.key[0].split("+")
+    st.dataframe(partial.tail(PREVIEW_TABLE_ROWS), height=200)
+    if job.rows > len(partial):
+        st.caption(f"Preview of the latest {len(partial):,} events.")
+    m = leafmap.Map(center=get_country_store().region_center(iso3s, gdf), zoom=map_zoom(iso3s))
+    add_event_layer(m, gdf)
+    m.to_streamlit(height=500)
+
+
+def add_legend(m):
+    m.add_legend(
+        title="Legend",
+        labels=["Fatal event", "Non-fatal event"],
+        colors=["#FF0000", "#000000"]
+    )
+
+
+def draw_viewport_map(geo_acled, center_latlon, zoom):
+    """Events map that only receives the events in view.
+
+    The base map is rendered once per dataset. On every pan or zoom the
+    component reports its bounds and zoom, and only the event layer is
+    replaced: points when few events are in view, clusters otherwise.
+    """
+    import folium
+    import leafmap.foliumap as leafmap
+    from streamlit_folium import st_folium
+    from acled.render import add_cell_layer, add_point_layer
+    from acled.viewport import viewport_events, viewport_index
+
+    map_key = "events_map_" + "_".join(map(str, st.session_state["dataset"].dataset.key))
+    view = st.session_state.get(map_key) or {}
+    bounds = view.get("bounds") or {}
+    south_west, north_east = bounds.get("_southWest"), bounds.get("_northEast")
+    if south_west and north_east and view.get("zoom") is not None:
+        bounds = (south_west["lng"], south_west["lat"], north_east["lng"], north_east["lat"])
+        view_zoom = int(view["zoom"])
+    else:
+        # Before the map has reported its viewport, cover all the events.
+        bounds, view_zoom = viewport_index(geo_acled).extent, zoom
+
+    with stage("viewport", zoom=view_zoom) as s:
+        mode, shown, n_events = viewport_events(geo_acled, bounds, view_zoom)
+        layer = folium.FeatureGroup(name="Conflict events")
+        if shown.empty:
+            pass  # nothing in view; the empty group clears the previous layer
+        elif mode == "points":
+            add_point_layer(layer, shown)
+        else:
+            add_cell_layer(layer, shown)
+        s.rows = len(shown)
+
+    m = leafmap.Map(center=center_latlon, zoom=zoom)
+    add_legend(m)
+    st_folium(
+        m, key=map_key, feature_group_to_add=layer, returned_objects=["bounds", "zoom"],
+        height=500, use_container_width=True,
+    )
+    if mode == "points":
+        st.caption(f"Showing the {n_events:,} events in view." if n_events else "No events in view.")
+    else:
+        st.caption(
+            f"{n_events:,} events in view, grouped into {len(shown):,} clusters sized by "
+            "event count. Zoom in to see individual events."
+        )
+
+
 def main():
     fetch_data = st.button("Fetch conflict data")
 
     if fetch_data:
-        with st.spinner("Fetching conflict data..."):
-            try:
-                result = fetch_conflict_data(period, selected_iso_num, selected_iso3)
-            except Exception as e:
-                st.error(f"Failed to fetch data: {e}")
-                return
-
-        if result is None:
-            st.warning("No data available for this period. Please select a more recent date range.")
-            return
-
-        geojson, center_latlon, df = result
-
-        # Save to session state for other pages
-        st.session_state["selected_country"] = selected_country
-        st.session_state["start_date"] = start_date
-        st.session_state["end_date"] = end_date
-        st.session_state["geo_acled"] = geojson
-        st.session_state["center_latlon"] = center_latlon
-        st.session_state["selected_iso3"] = selected_iso3
-        st.session_state["df"] = df
-        st.session_state["data_loaded"] = True
+        # The download runs as a background job: identical requests from
+        # other sessions share it, and the page stays usable meanwhile.
+        shard_by = shard_labels[shard_label]
+        start_fetch(
+            dataset_key(selected_iso3s, period),
+            lambda job: run_fetch(job, period, iso_by_iso3, shard_by),
+            selected_country=selected_country,
+            start_date=start_date,
+            end_date=end_date,
+            selected_iso3s=selected_iso3s,
+        )
 
+    job = finish_fetch()
+    if job is not None:
+        show_fetch_outcome(job)
+        stats = job.details.get("cache")
+        if stats:
+            st.caption(
+                f"🗄️ Local cache: {sum(s.hits for s in stats.values())} month(s) served from disk, "
+                f"{sum(s.misses for s in stats.values())} missing and "
+                f"{sum(s.stale for s in stats.values())} stale month(s) fetched from ACLED."
+            )
+        n_countries = len(job.key[0].split("+"))
+        if n_countries > 1 and stats is not None and len(stats) < n_countries:
+            st.caption(f"🧠 {n_countries - len(stats)} of {n_countries} countries were already loaded in memory.")
+
+    if follow_fetch(preview=preview_events):
+        return
+
+    if job is not None and job.status == DONE:
+        dataset = st.session_state["dataset"].dataset
+        geojson = dataset.frame
         st.success(
             f"Fetched {len(geojson)} conflict events from "
-            f"{geojson['event_date'].min()} to {geojson['event_date'].max()} "
-            f"for {selected_country}."
+            f"{geojson['event_date'].min():%Y-%m-%d} to {geojson['event_date'].max():%Y-%m-%d} "
+            f"for {st.session_state['selected_country']}."
+        )
+        st.caption(
+            f"🧠 Dataset memory: {format_bytes(dataset.nbytes)}, one copy shared by "
+            "every session in this process."
         )
-        with st.expander("See DataFrame"):
-            st.dataframe(df)
 
     # Render map if data is available
     if st.session_state.get("data_loaded"):
-        geo_acled = st.session_state["geo_acled"]
+        # The mapping stack (leafmap alone takes seconds to import) is only
+        # loaded once there is something to draw.
+        import leafmap.foliumap as leafmap
+        from acled.render import POINT_THRESHOLD, add_event_layer
+
+        geo_acled = filter_events(st.session_state["geo_acled"])
         center_latlon = st.session_state["center_latlon"]
+        if geo_acled.empty:
+            st.info("No events match the current filters.")
+            return
 
-        def get_color(value):
-            return "red" if value > 0 else "black"
-
-        m = leafmap.Map(center=center_latlon, zoom=4)
-        for _, row in geo_acled.iterrows():
-            folium.CircleMarker(
-                location=[row['latitude'], row['longitude']],
-                radius=6,
-                color=get_color(row['fatalities']),
-                fill=True,
-                fill_color=get_color(row['fatalities']),
-                fill_opacity=0.7,
-                popup=(
-                    f"Fatalities: {row['fatalities']}\n"
-                    f"Admin1: {row['admin1']}\n"
-                    f"Event date: {row['event_date']}"
-                )
-            ).add_to(m)
-        m.add_legend(
-            title="Legend",
-            labels=["Fatal event", "Non-fatal event"],
-            colors=["#FF0000", "#000000"]
+        with st.expander("See DataFrame"):
+            show_event_table(geo_acled, key="events_table")
+
+        zoom = map_zoom(st.session_state["selected_iso3s"])
+        streaming = importlib.util.find_spec("streamlit_folium") is not None and st.toggle(
+            "Stream only the visible area",
+            value=True,
+            help="Send the browser only the events in view, as clusters when zoomed out.",
         )
-        m.to_streamlit(height=500)
+        if streaming:
+            draw_viewport_map(geo_acled, center_latlon, zoom)
+            return
 
+        with stage("map_html", page="events") as s:
+            s.rows = len(geo_acled)
+            m = leafmap.Map(center=center_latlon, zoom=zoom)
+            mode = add_event_layer(m, geo_acled)
+            if mode == "grid":
+                st.caption(
+                    f"{len(geo_acled):,} events are more than the {POINT_THRESHOLD:,}-point limit, "
+                    "so nearby events are aggregated into grid cells sized by event count."
+                )
+            add_legend(m)
+            m.to_streamlit(height=500)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    show_metrics_panel()
\ No newline at end of file
@@ -1,10 +1,46 @@
 import streamlit as st
-import leafmap.foliumap as leafmap
+
+from acled.instrument import stage
+from acled.reference import events_bounds, get_country_store
+from acled.session import (
+    filter_events, finish_fetch, follow_fetch, show_fetch_outcome, show_metrics_panel,
+)
+
+
+def density_bounds(geo_acled, iso3s, pad=0.05):
+    """Extent of the events, clipped to the countries' bounds, with a margin.
+
+    A country's box alone can span most of the globe (across the antimeridian,
+    or with overseas territories), which would squeeze the events into a few
+    cells; the clip only drops events placed outside the countries.
+    """
+    minx, miny, maxx, maxy = events_bounds(geo_acled)
+    if iso3s:
+        cminx, cminy, cmaxx, cmaxy = get_country_store().region_bounds(iso3s, geo_acled)
+        if max(minx, cminx) < min(maxx, cmaxx) and max(miny, cminy) < min(maxy, cmaxy):
+            minx, miny = max(minx, cminx), max(miny, cminy)
+            maxx, maxy = min(maxx, cmaxx), min(maxy, cmaxy)
+    # Keeps the smoothing kernel (and events on the edge) inside the grid.
+    margin = max(maxx - minx, maxy - miny, 1.0) * pad
+    return minx - margin, miny - margin, maxx + margin, maxy + margin
+
 
 st.title("Conflict Density Explorer")
 
+# A fetch started on the events page keeps running while this page is open;
+# follow it here and switch to its dataset once it completes.
+finished_job = finish_fetch()
+if finished_job is not None:
+    show_fetch_outcome(finished_job)
+fetching = follow_fetch()
+
 if "geo_acled" in st.session_state and "center_latlon":
-    geo_acled = st.session_state["geo_acled"]
+    # Map modules are imported only when there is data to draw.
+    import leafmap.foliumap as leafmap
+    from acled.density import SMOOTHING_CELLS, add_density_overlay, event_density, grid_points
+    from acled.hexbin import LEVELS, add_hex_layer, hex_pyramid, level_for_zoom
+
+    geo_acled = filter_events(st.session_state["geo_acled"])
     center_latlon = st.session_state["center_latlon"]
     selected_country = st.session_state["selected_country"]
     start_date = st.session_state["start_date"] 
@@ -12,17 +48,54 @@ if "geo_acled" in st.session_state and "center_latlon":
 
     st.success(f"Loaded {len(geo_acled)} conflict events from {start_date} to {end_date} for {selected_country}")
 
-    m = leafmap.Map(center= center_latlon, zoom=4)
-    m.add_heatmap(
-        geo_acled,
-        latitude="latitude",
-        longitude="longitude",
-        value="fatalities",
-        name="Conflict Heatmap",
-        radius=20,
-    )
-    m.to_streamlit(height=500)
-else:
+    if geo_acled.empty:
+        st.info("No events match the current filters.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            weight = st.radio("Weight", ["fatalities", "events"], horizontal=True, format_func=str.capitalize)
+        with col2:
+            display = st.radio("Display", ["Density raster", "Heatmap", "Hexagons"], horizontal=True)
+
+        if display == "Hexagons":
+            # Every hexagon level is precomputed per dataset; the zoom only
+            # picks which one to draw.
+            zoom = st.select_slider("Map zoom", options=list(range(4, 11)), value=5)
+            level = level_for_zoom(zoom)
+            size_km = LEVELS[level][0]
+            with stage("hex_pyramid") as s:
+                levels, lat0 = hex_pyramid(geo_acled)
+                s.rows = len(geo_acled)
+            st.caption(f"{len(levels[level]):,} hexagons of {size_km} km radius.")
+            m = leafmap.Map(center=center_latlon, zoom=zoom)
+            add_hex_layer(m, levels[level], size_km, lat0, metric=weight)
+        else:
+            # Binned on the server (and cached per dataset), so the page only
+            # carries one value per grid cell however many events are loaded. The
+            # browser heatmap blurs on its own, so it gets the unsmoothed cells.
+            bounds = density_bounds(geo_acled, st.session_state.get("selected_iso3s", ()))
+            sigma = SMOOTHING_CELLS if display == "Density raster" else 0
+            with stage("density", weight=weight, sigma=sigma) as s:
+                grid, grid_bounds = event_density(geo_acled, bounds, weight=weight, sigma=sigma)
+                s.rows = len(geo_acled)
+
+            m = leafmap.Map(center= center_latlon, zoom=4)
+            if display == "Density raster":
+                add_density_overlay(m, grid, grid_bounds, name="Conflict density")
+            else:
+                m.add_heatmap(
+                    grid_points(grid, grid_bounds),
+                    latitude="latitude",
+                    longitude="longitude",
+                    value="value",
+                    name="Conflict Heatmap",
+                    radius=20,
+                )
+        with stage("map_html", page="density", display=display):
+            m.to_streamlit(height=500)
+elif not fetching:
     st.warning("No conflict data loaded. Please go to the conflict events data page first.")
 
+show_metrics_panel()
+
 
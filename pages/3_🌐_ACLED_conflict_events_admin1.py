@@ -1,94 +1,103 @@
 import streamlit as st
-import geopandas as gpd
-import requests
-import leafmap.foliumap as leafmap
-import pandas as pd
 
-st.title("Conflict Explorer subnational level")
-
-def get_boundaries_ADM1(iso3):
-    # Get the metadata from the GeoBoundaries API
-    url = f"https://www.geoboundaries.org/api/current/gbOpen/{iso3}/ADM1/"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise ValueError(f"Could not fetch data for {iso3}, status code: {response.status_code}")
+from acled.boundaries import get_region_boundaries, pick_tolerance
+from acled.cube import TimeCube, cube_for
+from acled.instrument import stage
+from acled.session import (
+    filter_events, finish_fetch, follow_fetch, show_event_table, show_fetch_outcome,
+    show_metrics_panel,
+)
 
-    metadata = response.json()
-    
-    # Extract the simplified GeoJSON URL
-    simplified_url = metadata.get("simplifiedGeometryGeoJSON")
-    if not simplified_url:
-        raise ValueError("No simplifiedGeometryGeoJSON found in API response.")
-
-    # Read the GeoJSON into a GeoDataFrame
-    boundary_polygons = gpd.read_file(simplified_url)
-    return boundary_polygons
+st.title("Conflict Explorer subnational level")
 
+MAP_ZOOM = 4
 
+finished_job = finish_fetch()
+if finished_job is not None:
+    show_fetch_outcome(finished_job)
+fetching = follow_fetch()
 
 if "geo_acled" in st.session_state:
-    geo_acled = st.session_state["geo_acled"]
+    # Deferred until there is data: leafmap dominates this page's cold start.
+    import leafmap.foliumap as leafmap
+    from acled.aggregate import aggregate_by_polygon
+
+    geo_acled = filter_events(st.session_state["geo_acled"])
     center_latlon = st.session_state["center_latlon"]
     selected_country = st.session_state["selected_country"]
-    selected_iso3 = st.session_state["selected_iso3"]
+    selected_iso3s = st.session_state["selected_iso3s"]
     start_date = st.session_state["start_date"] 
     end_date = st.session_state["end_date"] 
 
     st.success(f"Adm1 data loaded from {start_date} to {end_date} for {selected_country}")
 
-    with st.expander("See DataFrame"):
-            st.dataframe(geo_acled.drop(columns='geometry'))
-    
-    geo_acled['event_date'] = pd.to_datetime(geo_acled['event_date'], format="%Y-%m-%d", errors='coerce')
-
-
-    geo_acled['month_date'] = geo_acled['event_date'].dt.to_period('M').dt.to_timestamp().dt.strftime('%Y-%m-%d')
+    if geo_acled.empty:
+        st.info("No events match the current filters.")
+    else:
+        admin_level = st.radio("Admin level", ["ADM1", "ADM2"], horizontal=True)
 
+        with st.expander("See DataFrame"):
+            show_event_table(geo_acled, key="admin1_table")
     
-
-    # Group by month and admin1
-    monthly_fatalities = geo_acled.groupby(['month_date', 'admin1'])['fatalities'].sum().reset_index()
-
-    # Pivot the table so each admin1 is a column
-    pivot_df = monthly_fatalities.pivot(index='month_date', columns='admin1', values='fatalities')
-    pivot_df = pivot_df.fillna(0)  # Fill NaNs with 0
-    # print(geo_acled["event_date"].min())
-    # print(geo_acled["event_date"].max())
-
-
-
-    boundary_polygons = get_boundaries_ADM1(selected_iso3)
-
-    # Perform a spatial join to associate points with polygons
-    spatial_join = gpd.sjoin(geo_acled, boundary_polygons, how='inner', predicate='intersects')
-    # Group by the 'ADM1' and calculate the sum of fatalities
-    aggregated_data = spatial_join.groupby('shapeName')['fatalities'].sum().reset_index()
-    # print(aggregated_data.head())
-    # Merge the aggregated data back into the boundary polygon dataset
-    fatalities_adm1 = boundary_polygons.merge(aggregated_data, on='shapeName', how='left')
-    fatalities_adm1['fatalities']=fatalities_adm1['fatalities'].fillna(0)
-    max_fat = fatalities_adm1['fatalities'].max()
-
-    m = leafmap.Map(center=center_latlon, zoom=4)
-
-    m.add_data(fatalities_adm1,
-                column="fatalities",
-                scheme="NaturalBreaks", 
-                cmap="Reds", 
-                legend_title="Fatalities by Adm1",
-                layer_name = "Fatalities by Adm1"
+        # Per-bucket totals come precomputed from the fetch, so reruns only
+        # slice the cube and never touch the shared event frame. A filtered view
+        # gets its own cube, built once per filter.
+        if geo_acled is st.session_state["geo_acled"]:
+            cube = st.session_state.get("cube") or TimeCube.build(geo_acled)
+        else:
+            cube = cube_for(geo_acled)
+        bucket = st.radio("Time bucket", ["month", "week", "day"], horizontal=True, format_func=str.capitalize)
+        metric = st.radio("Chart metric", ["fatalities", "events"], horizontal=True, format_func=str.capitalize)
+        # A region is compared country by country; admin1 names can repeat
+        # across countries, so the per-admin1 chart is for single countries.
+        region = "country" if len(selected_iso3s) > 1 else "admin1"
+        pivot_df = cube.series(bucket, region, metric)
+
+        iso3_label = "+".join(selected_iso3s)
+        map_zoom = MAP_ZOOM if len(selected_iso3s) == 1 else MAP_ZOOM - 1
+        with stage("boundaries", iso3=iso3_label, level=admin_level) as s:
+            boundary_polygons = get_region_boundaries(selected_iso3s, admin_level)
+            # Simplified polygons keep the row order, so the totals attach by position
+            display_polygons = get_region_boundaries(
+                selected_iso3s, admin_level, pick_tolerance(zoom=map_zoom)
             )
+            s.rows = len(boundary_polygons)
 
-    col1, col2 = st.columns(2)
-
-    with col1:
-        m.to_streamlit(height=300, width=400)
+        # Assign events to polygons (memoized per dataset) and total them per polygon
+        with stage("aggregate", iso3=iso3_label, level=admin_level) as s:
+            aggregated_data = aggregate_by_polygon(
+                geo_acled, boundary_polygons, key=(selected_iso3s, admin_level)
+            )
+            s.rows = len(geo_acled)
+        fatalities_adm1 = display_polygons.assign(
+            fatalities=aggregated_data['fatalities'].to_numpy(),
+            events=aggregated_data['events'].to_numpy(),
+        )
+        max_fat = fatalities_adm1['fatalities'].max()
+
+        col1, col2 = st.columns(2)
+
+        with col1, stage("map_html", page="admin1", level=admin_level) as s:
+            s.rows = len(fatalities_adm1)
+            m = leafmap.Map(center=center_latlon, zoom=map_zoom)
+
+            m.add_data(fatalities_adm1,
+                        column="fatalities",
+                        scheme="NaturalBreaks", 
+                        cmap="Reds", 
+                        legend_title=f"Fatalities by {admin_level}",
+                        layer_name = f"Fatalities by {admin_level}"
+                    )
+
+            m.to_streamlit(height=300, width=400)
     
     
-    with col2:
-        st.bar_chart(pivot_df)
-        # with st.expander("See DataFrame"):
-        #     st.dataframe(pivot_df)
+        with col2:
+            st.bar_chart(pivot_df)
+            # with st.expander("See DataFrame"):
+            #     st.dataframe(pivot_df)
         
-else:
-    st.warning("No conflict data loaded. Please go to the conflict events data page first.")
\ No newline at end of file
+elif not fetching:
+    st.warning("No conflict data loaded. Please go to the conflict events data page first.")
+
+show_metrics_panel()
@@ -0,0 +1,79 @@
+"""Benchmark admin-level fatality aggregation against the original sjoin.
+
+    python tests/bench_aggregate.py               # 500k events, 30 polygons
+    python tests/bench_aggregate.py 1000000 200
+
+Polygons are a Voronoi partition of the event extent, which gives irregular
+admin-like shapes with shared borders.
+"""
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.aggregate import aggregate_by_polygon  # noqa: E402
+
+
+def synthetic_admin_polygons(n, bounds=(22.0, 44.0, 40.0, 52.0), seed=0):
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = bounds
+    seeds = shapely.multipoints(np.column_stack([rng.uniform(minx, maxx, n), rng.uniform(miny, maxy, n)]))
+    extent = shapely.box(*bounds)
+    cells = shapely.get_parts(shapely.voronoi_polygons(seeds, extend_to=extent))
+    cells = shapely.intersection(cells, extent)
+    # Densify the borders so polygons carry a realistic number of vertices.
+    cells = shapely.segmentize(cells, 0.01)
+    return gpd.GeoDataFrame({'shapeName': [f"Region {i}" for i in range(len(cells))]}, geometry=cells, crs='EPSG:4326')
+
+
+def synthetic_events(n, bounds=(22.0, 44.0, 40.0, 52.0), seed=1):
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = bounds
+    lon = rng.uniform(minx, maxx, n)
+    lat = rng.uniform(miny, maxy, n)
+    return gpd.GeoDataFrame({
+        'event_id_cnty': [f"SYN{i}" for i in range(n)],
+        'fatalities': rng.poisson(0.8, n).astype('int16'),
+        'longitude': lon.astype('float32'),
+        'latitude': lat.astype('float32'),
+    }, geometry=gpd.points_from_xy(lon, lat), crs='EPSG:4326')
+
+
+def sjoin_aggregate(events, polygons):
+    """What the admin1 page did before acled.aggregate existed."""
+    spatial_join = gpd.sjoin(events, polygons, how='inner', predicate='intersects')
+    aggregated = spatial_join.groupby('shapeName')['fatalities'].sum().reset_index()
+    return polygons.merge(aggregated, on='shapeName', how='left')
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("n_events", nargs="?", type=int, default=500_000)
+    parser.add_argument("n_polygons", nargs="?", type=int, default=30)
+    args = parser.parse_args()
+    n_events, n_polygons = args.n_events, args.n_polygons
+    events = synthetic_events(n_events)
+    polygons = synthetic_admin_polygons(n_polygons)
+
+    sjoin_s, expected = timed(sjoin_aggregate, events, polygons)
+    cold_s, actual = timed(aggregate_by_polygon, events, polygons, key=("BENCH", "ADM1"))
+    warm_s, _ = timed(aggregate_by_polygon, events, polygons, key=("BENCH", "ADM1"))
+
+    # Points exactly on a border are counted once here but in both polygons by sjoin.
+    diff = np.abs(expected['fatalities'].fillna(0).to_numpy() - actual['fatalities'].to_numpy()).sum()
+    print(f"{n_events:,} events, {len(polygons)} polygons (fatalities differing: {diff:.0f})")
+    print(f"  sjoin + groupby + merge   {sjoin_s:8.2f} s")
+    print(f"  STRtree contains (cold)   {cold_s:8.2f} s   {sjoin_s / cold_s:6.1f}x")
+    print(f"  memoized rerun (warm)     {warm_s:8.2f} s   {sjoin_s / warm_s:6.1f}x")
@@ -0,0 +1,79 @@
+"""Benchmark record-to-GeoDataFrame conversion on synthetic ACLED payloads.
+
+    python tests/bench_convert.py            # 100k and 1M events
+    python tests/bench_convert.py 250000     # custom sizes
+
+Compares the original per-record loop + shapely ``Point`` list against the
+columnar path in ``acled.frame``.
+"""
+import argparse
+import os
+import sys
+import time
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import Point
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.frame import records_to_frame, to_geodataframe  # noqa: E402
+from mock_acled import make_events  # noqa: E402
+
+
+def loop_convert(records):
+    """The conversion fetch_conflict_data used before acled.frame existed."""
+    all_data = []
+    for record in records:
+        event_date = record.get('event_date', '')
+        year, month, day = (event_date.split('-') + [None, None, None])[:3]
+        all_data.append({
+            'event_id_cnty': record.get('event_id_cnty'),
+            'event_date': event_date,
+            'year': int(year) if year else None,
+            'month': int(month) if month else None,
+            'day': int(day) if day else None,
+            'actor1': record.get('actor1'),
+            'actor2': record.get('actor2'),
+            'interaction': record.get('interaction'),
+            'country': record.get('country'),
+            'admin1': record.get('admin1'),
+            'admin2': record.get('admin2'),
+            'admin3': record.get('admin3'),
+            'location': record.get('location'),
+            'fatalities': int(record.get('fatalities', 0)),
+            'latitude': float(record.get('latitude', 0)),
+            'longitude': float(record.get('longitude', 0)),
+            'geo_precision': record.get('geo_precision')
+        })
+    df = pd.DataFrame(all_data)
+    df['event_date'] = pd.to_datetime(df['event_date'], format="%Y-%m-%d", errors='coerce')
+    geometry = [Point(xy) for xy in zip(df['longitude'], df['latitude'])]
+    return gpd.GeoDataFrame(df, geometry=geometry, crs='EPSG:4326')
+
+
+def columnar_convert(records):
+    df = records_to_frame(records)
+    df['event_date'] = pd.to_datetime(df['event_date'], format="%Y-%m-%d", errors='coerce')
+    return to_geodataframe(df)
+
+
+def timed(func, records):
+    start = time.perf_counter()
+    result = func(records)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[100_000, 1_000_000])
+    sizes = parser.parse_args().sizes
+    print(f"{'events':>10} {'loop (s)':>10} {'columnar (s)':>13} {'speedup':>8}")
+    for n in sizes:
+        records = make_events(n)
+        loop_s, expected = timed(loop_convert, records)
+        columnar_s, actual = timed(columnar_convert, records)
+        assert len(actual) == len(expected)
+        assert (actual['fatalities'].to_numpy() == expected['fatalities'].to_numpy()).all()
+        assert actual.geometry.geom_equals(expected.geometry).all()
+        print(f"{n:>10,} {loop_s:>10.2f} {columnar_s:>13.2f} {loop_s / columnar_s:>7.1f}x")
@@ -0,0 +1,68 @@
+"""Benchmark events-map HTML size and build time against event count.
+
+    python tests/bench_render.py                 # 1k, 5k, 20k, 100k events
+    python tests/bench_render.py 50000 200000
+
+"markers" is the original one-CircleMarker-per-event loop (skipped above
+``--max-markers`` events because it gets impractically slow); "auto" is
+``acled.render.add_event_layer``.
+"""
+import argparse
+import os
+import sys
+import time
+
+import folium
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.frame import records_to_frame, to_geodataframe  # noqa: E402
+from acled.render import add_event_layer  # noqa: E402
+from acled.schema import compact  # noqa: E402
+from mock_acled import make_events  # noqa: E402
+
+
+def marker_loop(m, gdf):
+    """The per-event layer the events page built before acled.render existed."""
+    for _, row in gdf.iterrows():
+        color = "red" if row['fatalities'] > 0 else "black"
+        folium.CircleMarker(
+            location=[row['latitude'], row['longitude']],
+            radius=6,
+            color=color,
+            fill=True,
+            fill_color=color,
+            fill_opacity=0.7,
+            popup=(
+                f"Fatalities: {row['fatalities']}\n"
+                f"Admin1: {row['admin1']}\n"
+                f"Event date: {row['event_date']:%Y-%m-%d}"
+            )
+        ).add_to(m)
+    return "markers"
+
+
+def render(layer, gdf):
+    """Return ``(seconds, html_bytes, mode)`` for building and rendering one map."""
+    start = time.perf_counter()
+    m = folium.Map(location=[48, 31], zoom_start=4)
+    mode = layer(m, gdf)
+    html = m.get_root().render()
+    return time.perf_counter() - start, len(html.encode()), mode
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 5_000, 20_000, 100_000])
+    parser.add_argument("--max-markers", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'events':>9} {'layer':>8} {'mode':>8} {'time (s)':>9} {'HTML (MB)':>10}")
+    for n in args.sizes:
+        gdf = compact(to_geodataframe(records_to_frame(make_events(n))))
+        layers = [("auto", add_event_layer)]
+        if n <= args.max_markers:
+            layers.insert(0, ("markers", marker_loop))
+        for label, layer in layers:
+            seconds, size, mode = render(layer, gdf)
+            print(f"{n:>9,} {label:>8} {mode:>8} {seconds:>9.2f} {size / 1024 ** 2:>10.2f}")
@@ -0,0 +1,73 @@
+"""Measure cold-start time-to-first-paint of every page.
+
+    python tests/bench_startup.py
+
+Each page runs in a fresh interpreter (so no heavy module is already
+imported) through Streamlit's ``AppTest``. "first paint" is the time from
+the start of the script run to the first element sent to the browser;
+"script" is the full run. Streamlit itself is imported before the clock
+starts, as it is in a running server.
+"""
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(script):
+    """Run one page in this process and return its timings in seconds."""
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    first_paint = []
+    enqueue = DeltaGenerator._enqueue
+
+    def timed_enqueue(self, *args, **kwargs):
+        if not first_paint:
+            first_paint.append(time.perf_counter())
+        return enqueue(self, *args, **kwargs)
+
+    DeltaGenerator._enqueue = timed_enqueue
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    done = time.perf_counter()
+    return {
+        "first_paint": (first_paint[0] if first_paint else done) - start,
+        "script": done - start,
+        "exceptions": [e.message for e in at.exception],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        sys.path.insert(0, ROOT)
+        print(json.dumps(measure(sys.argv[2])))
+        sys.exit()
+
+    scripts = ["app.py"] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    env = {
+        **os.environ,
+        "ACLED_EMAIL": os.getenv("ACLED_EMAIL", "bench@example.org"),
+        "ACLED_PASSWORD": os.getenv("ACLED_PASSWORD", "bench"),
+        "ACLED_CACHE_DIR": tempfile.mkdtemp(prefix="acled-startup-"),
+    }
+    print(f"{'page':<48} {'first paint (s)':>16} {'script (s)':>11}")
+    for script in scripts:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", script],
+            capture_output=True, text=True, env=env, cwd=ROOT,
+        )
+        try:
+            # Background threads (boundary prefetch) may log after the result.
+            result = json.loads(next(l for l in out.stdout.splitlines() if l.startswith("{")))
+        except (StopIteration, ValueError):
+            print(f"{script:<48} failed:\n{out.stderr[-2000:]}")
+            continue
+        note = f"  errors: {result['exceptions']}" if result["exceptions"] else ""
+        print(f"{script:<48} {result['first_paint']:>16.2f} {result['script']:>11.2f}{note}")
@@ -0,0 +1,193 @@
+"""Offline end-to-end benchmark of the events pipeline, with regression tracking.
+
+    python tests/bench_suite.py                          # 1k, 10k, 100k events
+    python tests/bench_suite.py --sizes 1000000 5000000 --max-fetch 1000000
+    python tests/bench_suite.py --latency 0.05 --update-baseline
+
+Everything runs against local stand-ins: a mock ACLED API in a background
+thread (``mock_acled``, with optional per-request latency) and the Mockland
+ADM1 fixture. Per size it times each stage of the pipeline:
+
+    fetch      paging through the mock API (HTTP + JSON)
+    parse      records -> typed DataFrame, page by page
+    geometry   point geometries and compact dtypes
+    join       assigning events to ADM1 polygons
+    aggregate  per-polygon totals and the date x region cube
+    map_html   building and rendering the events map
+
+Timings are compared with a stored baseline; a stage slower than the
+baseline by more than ``--tolerance`` (and by at least 50 ms) counts as a
+regression and makes the script exit with status 1. Every run is appended
+to a JSONL history next to the baseline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import folium
+import geopandas as gpd
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from acled.aggregate import aggregate_by_polygon, assign_points  # noqa: E402
+from acled.client import AcledClient  # noqa: E402
+from acled.cube import TimeCube  # noqa: E402
+from acled.fetch import PAGE_SIZE, iter_pages  # noqa: E402
+from acled.frame import records_to_frame, to_geodataframe  # noqa: E402
+from acled.render import add_event_layer  # noqa: E402
+from acled.schema import compact  # noqa: E402
+from acled.store import CACHE_DIR  # noqa: E402
+from mock_acled import ADM1_FIXTURE, CENTER, make_columns, records, serve_in_background  # noqa: E402
+
+STAGES = ["fetch", "parse", "geometry", "join", "aggregate", "map_html"]
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def bench_fetch(n_events, latency, page_size):
+    """Page through a mock API serving ``n_events``; records are discarded."""
+    server, base_url = serve_in_background(n_events, latency=latency)
+    try:
+        client = AcledClient("bench@example.org", "bench", base_url=base_url)
+        rows = 0
+        start = time.perf_counter()
+        for page in iter_pages({"iso": 0}, client, page_size=page_size):
+            rows += len(page)
+        return time.perf_counter() - start, rows
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_parse(columns, n_events, page_size):
+    """Convert page-sized batches as the app does; record building is not timed."""
+    seconds = 0.0
+    chunks = []
+    for start in range(0, n_events, page_size):
+        page = records(columns, start, min(start + page_size, n_events))
+        elapsed, chunk = timed(records_to_frame, page)
+        seconds += elapsed
+        chunks.append(chunk)
+    elapsed, df = timed(pd.concat, chunks, ignore_index=True)
+    return seconds + elapsed, df
+
+
+def render_map(gdf):
+    m = folium.Map(location=[CENTER[1], CENTER[0]], zoom_start=5)
+    add_event_layer(m, gdf)
+    return m.get_root().render()
+
+
+def aggregate(gdf, adm1, key):
+    TimeCube.build(gdf)
+    return aggregate_by_polygon(gdf, adm1, key=key)
+
+
+def run(n_events, adm1, latency=0.0, page_size=PAGE_SIZE, max_fetch=1_000_000):
+    """Return ``{stage: seconds}`` for one pipeline run over ``n_events``."""
+    timings = {}
+    if n_events <= max_fetch:
+        timings["fetch"], rows = bench_fetch(n_events, latency, page_size)
+        assert rows == n_events, f"fetched {rows} of {n_events} events"
+
+    columns = make_columns(n_events)
+    timings["parse"], df = bench_parse(columns, n_events, page_size)
+    del columns
+    timings["geometry"], gdf = timed(lambda: compact(to_geodataframe(df)))
+    del df
+    timings["join"], _ = timed(assign_points, gdf['longitude'], gdf['latitude'], adm1.geometry.values)
+    # aggregate_by_polygon memoizes the join per frame; warm it first so the
+    # stage measures the totals alone.
+    aggregate_by_polygon(gdf, adm1, key=("BENCH", n_events))
+    timings["aggregate"], _ = timed(aggregate, gdf, adm1, ("BENCH", n_events))
+    timings["map_html"], html = timed(render_map, gdf)
+    timings["map_bytes"] = len(html)
+    return timings
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the results table; return the ``(size, stage)`` pairs that regressed."""
+    regressions = []
+    print(f"{'events':>10} {'stage':<10} {'seconds':>9} {'baseline':>9} {'change':>8}")
+    for size, timings in results.items():
+        for stage in STAGES:
+            if stage not in timings:
+                continue
+            seconds = timings[stage]
+            before = baseline.get(size, {}).get(stage)
+            change = ""
+            if before:
+                change = f"{seconds / before - 1:+.0%}"
+                if seconds > before * (1 + tolerance) and seconds - before > MIN_REGRESSION_SECONDS:
+                    regressions.append((size, stage))
+                    change += "  REGRESSION"
+            before_text = f"{before:9.3f}" if before else f"{'-':>9}"
+            print(f"{int(size):>10,} {stage:<10} {seconds:9.3f} {before_text} {change:>8}")
+        print(f"{int(size):>10,} {'map size':<10} {timings['map_bytes'] / 1024 ** 2:8.1f}M")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--latency", type=float, default=0.0, help="mock API latency per request, seconds")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--max-fetch", type=int, default=1_000_000,
+                        help="skip the HTTP fetch stage above this many events")
+    parser.add_argument("--baseline", default=os.path.join(CACHE_DIR, "bench", "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    adm1 = gpd.read_file(ADM1_FIXTURE)
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = run(size, adm1, args.latency, args.page_size, args.max_fetch)
+
+    # Runs with different injected latency are not comparable, so the
+    # baseline file keeps one set of timings per latency.
+    profile = f"latency={args.latency:g}"
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(profile, {})
+    regressions = compare(results, baseline, args.tolerance)
+
+    os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+    with open(os.path.join(os.path.dirname(args.baseline), "history.jsonl"), "a") as f:
+        f.write(json.dumps({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "latency": args.latency,
+            "results": results,
+        }) + "\n")
+    if args.update_baseline or not baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**baselines, profile: {**baseline, **results}}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}.")
+        sys.exit(1)
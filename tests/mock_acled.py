@@ -0,0 +1,272 @@
+"""Local stand-in for the ACLED API and synthetic data, for offline runs.
+
+    python tests/mock_acled.py --port 8000 --events 50000 --latency 0.2
+    ACLED_BASE_URL=http://localhost:8000 streamlit run app.py
+
+Serves ``/oauth/token`` and a paginated ``/api/acled/read`` backed by
+deterministic synthetic events for "Mockland", an imaginary country whose
+ADM1 provinces ship as ``tests/fixtures/mockland_adm1.geojson``. The
+generator mimics the shape of real ACLED data: a few actors account for
+most events, events cluster around hotspots, most events have no
+fatalities and a few have many. Columns are generated with NumPy and
+records are only built page by page, so millions of events stay cheap.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ADM1_FIXTURE = os.path.join(FIXTURE_DIR, "mockland_adm1.geojson")
+
+# Mockland is an ellipse centred on CENTER with these semi-axes (degrees).
+CENTER = (31.0, 48.0)
+SEMI_AXES = (9.0, 4.0)
+N_PROVINCES = 12
+N_DISTRICTS = 80
+N_ACTORS = 400
+N_HOTSPOTS = 40
+
+ACTOR_KINDS = [
+    "Military Forces", "Police Forces", "Rebel Group", "Unidentified Armed Group",
+    "Protesters", "Rioters", "Civilians", "Communal Militia",
+]
+INTERACTIONS = ["10", "12", "13", "17", "27", "37", "60", "66", "67"]
+
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _inside_mockland(lon, lat, shrink=0.97):
+    """Pull points outside the country ellipse back onto its inner edge."""
+    dx = (lon - CENTER[0]) / SEMI_AXES[0]
+    dy = (lat - CENTER[1]) / SEMI_AXES[1]
+    r = np.hypot(dx, dy)
+    scale = np.where(r > shrink, shrink / np.maximum(r, 1e-12), 1.0)
+    return CENTER[0] + dx * scale * SEMI_AXES[0], CENTER[1] + dy * scale * SEMI_AXES[1]
+
+
+def _seeds(n, seed):
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 2 * np.pi, n)
+    radius = np.sqrt(rng.uniform(0, 0.9, n))
+    return np.column_stack([
+        CENTER[0] + radius * np.cos(angle) * SEMI_AXES[0],
+        CENTER[1] + radius * np.sin(angle) * SEMI_AXES[1],
+    ])
+
+
+PROVINCE_SEEDS = _seeds(N_PROVINCES, seed=7)
+DISTRICT_SEEDS = _seeds(N_DISTRICTS, seed=8)
+
+
+def _nearest(lon, lat, seeds, chunk=1_000_000):
+    # Nearest seed == containing Voronoi cell, which is how the fixture's
+    # provinces are drawn, so admin names agree with the geometry.
+    out = np.empty(len(lon), dtype=np.int32)
+    for start in range(0, len(lon), chunk):
+        stop = start + chunk
+        d = (lon[start:stop, None] - seeds[:, 0]) ** 2 + (lat[start:stop, None] - seeds[:, 1]) ** 2
+        out[start:stop] = d.argmin(axis=1)
+    return out
+
+
+def make_columns(n, seed=0, years=6):
+    """Generate ``n`` synthetic events as NumPy columns, sorted by date."""
+    rng = np.random.default_rng(seed)
+    last = datetime.date.today()
+    first = last - datetime.timedelta(days=365 * years)
+    days = np.sort(rng.integers(0, (last - first).days + 1, n))
+    dates = np.datetime_as_string(np.datetime64(first) + days.astype("timedelta64[D]"), unit="D")
+
+    hotspot_rng = np.random.default_rng(seed + 1)
+    hotspot_lon, hotspot_lat = _inside_mockland(
+        *_seeds(N_HOTSPOTS, seed=seed + 2).T
+    )
+    hotspot_sigma = hotspot_rng.uniform(0.03, 0.6, N_HOTSPOTS)
+    hotspot = rng.choice(N_HOTSPOTS, n, p=_zipf_weights(N_HOTSPOTS, 0.9))
+    lon = hotspot_lon[hotspot] + rng.normal(0, 1, n) * hotspot_sigma[hotspot]
+    lat = hotspot_lat[hotspot] + rng.normal(0, 1, n) * hotspot_sigma[hotspot] * 0.6
+    lon, lat = _inside_mockland(lon, lat)
+
+    actor_weights = _zipf_weights(N_ACTORS)
+    return {
+        "event_date": dates,
+        "actor1": rng.choice(N_ACTORS, n, p=actor_weights),
+        # Index N_ACTORS stands for "no second actor".
+        "actor2": np.where(rng.random(n) < 0.3, N_ACTORS, rng.choice(N_ACTORS, n, p=actor_weights)),
+        "interaction": rng.integers(0, len(INTERACTIONS), n),
+        "admin1": _nearest(lon, lat, PROVINCE_SEEDS),
+        "admin2": _nearest(lon, lat, DISTRICT_SEEDS),
+        "location": hotspot * 25 + np.minimum(rng.geometric(0.15, n), 25) - 1,
+        # Mostly zero with a long tail.
+        "fatalities": np.minimum(rng.negative_binomial(0.25, 0.2, n), 2000),
+        "longitude": lon,
+        "latitude": lat,
+        "geo_precision": rng.choice([1, 2, 3], n, p=[0.6, 0.3, 0.1]),
+    }
+
+
+def actor_name(i):
+    if i >= N_ACTORS:
+        return ""
+    return f"{ACTOR_KINDS[i % len(ACTOR_KINDS)]} ({i // len(ACTOR_KINDS) + 1})"
+
+
+def records(columns, start=0, stop=None):
+    """Build ACLED-style records (every value a string) for a slice of ``columns``."""
+    sl = slice(start, stop)
+    rows = zip(
+        range(start, start + len(columns["event_date"][sl])),
+        *(columns[k][sl].tolist() for k in (
+            "event_date", "actor1", "actor2", "interaction", "admin1", "admin2",
+            "location", "fatalities", "latitude", "longitude", "geo_precision",
+        ))
+    )
+    return [
+        {
+            "event_id_cnty": f"MCK{i}",
+            "event_date": date,
+            "actor1": actor_name(actor1),
+            "actor2": actor_name(actor2),
+            "interaction": INTERACTIONS[interaction],
+            "country": "Mockland",
+            "admin1": f"Province {admin1 + 1}",
+            "admin2": f"District {admin2 + 1}",
+            "admin3": "",
+            "location": f"Town {location + 1}",
+            "fatalities": str(fatalities),
+            "latitude": f"{latitude:.4f}",
+            "longitude": f"{longitude:.4f}",
+            "geo_precision": str(geo_precision),
+        }
+        for i, date, actor1, actor2, interaction, admin1, admin2, location,
+        fatalities, latitude, longitude, geo_precision in rows
+    ]
+
+
+def make_events(n, seed=0, years=6):
+    """Return ``n`` synthetic ACLED records from the last ``years``, sorted by date."""
+    return records(make_columns(n, seed=seed, years=years))
+
+
+def mockland_adm1():
+    """Mockland's provinces as a geoBoundaries-style GeoDataFrame."""
+    import geopandas as gpd
+    import shapely
+    from shapely import affinity
+
+    country = affinity.scale(shapely.Point(CENTER).buffer(1, quad_segs=32), *SEMI_AXES)
+    cells = shapely.get_parts(shapely.voronoi_polygons(
+        shapely.multipoints(PROVINCE_SEEDS), extend_to=country.envelope
+    ))
+    # voronoi_polygons does not keep the seed order; match cells to seeds.
+    order = [int(np.argmax(shapely.contains_xy(cells, *seed))) for seed in PROVINCE_SEEDS]
+    cells = shapely.segmentize(shapely.intersection(cells[order], country), 0.05)
+    return gpd.GeoDataFrame({
+        "shapeName": [f"Province {i + 1}" for i in range(N_PROVINCES)],
+        "shapeISO": [f"MK-{i + 1:02d}" for i in range(N_PROVINCES)],
+        "shapeGroup": "MCK",
+    }, geometry=cells, crs="EPSG:4326")
+
+
+def write_fixture(path=ADM1_FIXTURE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mockland_adm1().to_file(path, driver="GeoJSON", COORDINATE_PRECISION=4)
+
+
+class MockAcledHandler(BaseHTTPRequestHandler):
+    columns = make_columns(0)
+    latency = 0.0
+    jitter = 0.0
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def do_POST(self):
+        self._delay()
+        if urlparse(self.path).path != "/oauth/token":
+            return self._send_json({"error": "not found"}, 404)
+        self._send_json({"access_token": "mock-token", "expires_in": 86400})
+
+    def do_GET(self):
+        self._delay()
+        url = urlparse(self.path)
+        if url.path != "/api/acled/read":
+            return self._send_json({"error": "not found"}, 404)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        dates = self.columns["event_date"]
+        first, last = 0, len(dates)
+        if "event_date" in query:
+            start, end = query["event_date"].split("|")
+            first = int(np.searchsorted(dates, start, side="left"))
+            last = int(np.searchsorted(dates, end, side="right"))
+
+        limit = int(query.get("limit", 5000))
+        page = int(query.get("page", 1))
+        if limit:
+            first, last = first + (page - 1) * limit, min(last, first + page * limit)
+        rows = records(self.columns, first, max(first, last))
+        if "fields" in query:
+            fields = query["fields"].split("|")
+            rows = [{f: r[f] for f in fields if f in r} for r in rows]
+        self._send_json({"status": 200, "success": True, "count": len(rows), "data": rows})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port=8000, n_events=50000, latency=0.0, jitter=0.0, seed=0):
+    """A mock server for ``n_events`` events; ``latency``/``jitter`` delay every response (s)."""
+    handler = type("Handler", (MockAcledHandler,), {
+        "columns": make_columns(n_events, seed=seed),
+        "latency": latency,
+        "jitter": jitter,
+    })
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def serve_in_background(n_events, latency=0.0, jitter=0.0, seed=0):
+    """Start a mock server on a free port in a daemon thread; return ``(server, base_url)``."""
+    server = make_server(0, n_events, latency, jitter, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def serve(port=8000, n_events=50000, latency=0.0, jitter=0.0):
+    server = make_server(port, n_events, latency, jitter)
+    print(f"Mock ACLED API with {n_events} events on http://127.0.0.1:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay of up to this many seconds")
+    parser.add_argument("--write-fixture", action="store_true", help=f"regenerate {os.path.relpath(ADM1_FIXTURE)} and exit")
+    args = parser.parse_args()
+    if args.write_fixture:
+        write_fixture()
+    else:
+        serve(args.port, args.events, args.latency, args.jitter)
@@ -1,30 +1,19 @@
-import requests
 import os
+import sys
 import datetime
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.client import get_client  # noqa: E402
+
 load_dotenv()
 
 email = os.getenv("ACLED_EMAIL")
 password = os.getenv("ACLED_PASSWORD")
 
-def get_access_token(email, password):
-    response = requests.post(
-        "https://acleddata.com/oauth/token",
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-        data={
-            "username": email,
-            "password": password,
-            "grant_type": "password",
-            "client_id": "acled"
-        }
-    )
-    if response.status_code == 200:
-        return response.json()["access_token"]
-    else:
-        raise Exception(f"Failed to get token: {response.status_code} {response.text}")
-
-token = get_access_token(email, password)
+client = get_client(email, password)
+token = client.tokens.token()
 print(f"Token obtained: {token[:20]}...")
 
 # ── Date range ─────────────────────────────────────────────────────────────
@@ -43,14 +32,7 @@ params = {
     "direction": "desc"
 }
 
-response = requests.get(
-    "https://acleddata.com/api/acled/read",
-    params=params,
-    headers={
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-)
+response = client.get("/api/acled/read", params)
 
 data = response.json()
 print(f"Total count:  {data.get('count')}")
@@ -65,14 +47,7 @@ params_no_limit = {
     "_format": "json",
 }
 
-response2 = requests.get(
-    "https://acleddata.com/api/acled/read",
-    params=params_no_limit,
-    headers={
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-)
+response2 = client.get("/api/acled/read", params_no_limit)
 
 data2 = response2.json()
 print(f"\nWith limit=0:")
@@ -0,0 +1,49 @@
+import io
+import os
+import sys
+
+import geopandas as gpd
+import pandas as pd
+import pyogrio
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.export import FORMATS, export_events  # noqa: E402
+
+
+@pytest.fixture
+def events():
+    return gpd.GeoDataFrame({
+        'event_id_cnty': ["AFG1", "AFG2", "AFG3"],
+        'event_date': pd.to_datetime(["2024-01-02", "2024-01-05", "2024-02-01"]),
+        'event_type': pd.Categorical(["Battles", "Riots", "Battles"]),
+        'fatalities': [3, 0, 1],
+        'longitude': [65.0, 66.5, 69.2],
+        'latitude': [33.0, 34.5, 34.6],
+    }, geometry=gpd.points_from_xy([65.0, 66.5, 69.2], [33.0, 34.5, 34.6]), crs="EPSG:4326")
+
+
+def read_back(fmt, data, tmp_path):
+    if fmt == "CSV":
+        return pd.read_csv(io.BytesIO(data))
+    path = tmp_path / f"export.{FORMATS[fmt][0]}"
+    path.write_bytes(data)
+    return gpd.read_parquet(path) if fmt == "Parquet" else pyogrio.read_dataframe(path)
+
+
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_export_is_accepted_by_download_button(fmt, events, tmp_path):
+    with export_events(events, fmt) as f:
+        data, _ = convert_data_to_bytes_and_infer_mime(f, TypeError("unsupported"))
+    frame = read_back(fmt, data, tmp_path)
+    assert frame['event_id_cnty'].tolist() == ["AFG1", "AFG2", "AFG3"]
+    assert frame['fatalities'].tolist() == [3, 0, 1]
+    if fmt != "CSV":
+        assert frame.crs.to_epsg() == 4326
+
+
+def test_unknown_format_is_rejected(events):
+    with pytest.raises(ValueError):
+        export_events(events, "XLSX")
@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled import instrument  # noqa: E402
+from acled.instrument import stage  # noqa: E402
+
+
+def run_threads(target, n=8):
+    errors = []
+
+    def worker():
+        try:
+            target()
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_stages_write_the_prometheus_file(tmp_path, monkeypatch):
+    path = tmp_path / "acled.prom"
+    monkeypatch.setattr(instrument, "PROM_PATH", str(path))
+    monkeypatch.setattr(instrument, "_totals", {})
+
+    def stages():
+        for _ in range(300):
+            with stage("concurrent"):
+                pass
+
+    assert run_threads(stages) == []
+    assert 'acled_stage_calls_total{stage="concurrent"} 2400' in path.read_text()
+
+
+def test_unwritable_metrics_file_does_not_fail_the_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrument, "PROM_PATH", str(tmp_path / "missing" / "acled.prom"))
+    monkeypatch.setattr(instrument, "JSONL_PATH", str(tmp_path / "missing" / "acled.jsonl"))
+    with stage("unwritable") as s:
+        s.rows = 1
+    assert instrument.recent(1)[0].name == "unwritable"
+
+
+def test_nested_traced_stage_keeps_the_outer_peak(monkeypatch):
+    import tracemalloc
+
+    monkeypatch.setitem(instrument._capture, "tracemalloc", True)
+    tracemalloc.start()
+    try:
+        with stage("outer") as outer:
+            block = bytearray(8 * 1024 ** 2)
+            del block
+            with stage("inner"):
+                pass
+    finally:
+        tracemalloc.stop()
+    assert outer.peak_bytes >= 8 * 1024 ** 2
+
+
+def test_labels_json_cannot_encode_are_written_as_strings(tmp_path, monkeypatch):
+    import datetime
+    import json
+
+    import numpy as np
+
+    path = tmp_path / "acled.jsonl"
+    monkeypatch.setattr(instrument, "JSONL_PATH", str(path))
+    with stage("labels", day=datetime.date(2024, 1, 2), n=np.int64(3)):
+        pass
+    labels = json.loads(path.read_text().splitlines()[-1])["labels"]
+    assert labels == {"day": "2024-01-02", "n": "3"}
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.jobs import Job  # noqa: E402
+
+
+def test_recent_returns_the_latest_events_only():
+    job = Job(("AFG", "2024-01-01/2024-12-31"))
+    assert job.recent(10) is None
+    for start in range(0, 500, 100):
+        job.add_chunk(pd.DataFrame({'n': range(start, start + 100)}))
+    assert job.recent(150)['n'].tolist() == list(range(350, 500))
+    assert job.recent(1000)['n'].tolist() == list(range(500))
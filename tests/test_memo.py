@@ -0,0 +1,38 @@
+import os
+import sys
+import threading
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.memo import frame_lru, frame_memo  # noqa: E402
+
+
+def test_frame_lru_keeps_the_most_recent_items():
+    frame = pd.DataFrame({'a': [1]})
+    for item in range(5):
+        frame_lru(frame, ("items",), item, lambda item=item: [item], maxsize=3)
+    frame_lru(frame, ("items",), 2, lambda: ["recomputed"], maxsize=3)
+    assert list(frame_memo(frame, ("items",), dict)) == [3, 4, 2]
+
+
+def test_frame_lru_is_safe_across_threads():
+    frame = pd.DataFrame({'a': [1]})
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(2000):
+                item = (i + offset) % 12
+                assert frame_lru(frame, ("items",), item, lambda: [item], maxsize=4) == [item]
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(frame_memo(frame, ("items",), dict)) <= 4
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.reference import BUNDLED_PATH, CountryStore, _normalize, _with_summaries  # noqa: E402
+
+SINGAPORE = pd.DataFrame({'longitude': [103.7, 103.9], 'latitude': [1.3, 1.4]})
+
+
+@pytest.fixture(scope="module")
+def bundled():
+    return CountryStore(_with_summaries(_normalize(gpd.read_parquet(BUNDLED_PATH))), "bundled")
+
+
+def test_country_without_geometry_uses_the_events_extent(bundled):
+    assert "SGP" not in bundled
+    assert bundled.center("SGP", SINGAPORE) == pytest.approx([1.35, 103.8])
+    assert bundled.bounds("SGP", SINGAPORE) == (103.7, 1.3, 103.9, 1.4)
+
+
+def test_country_without_geometry_or_events_raises(bundled):
+    with pytest.raises(ValueError):
+        bundled.center("SGP")
+
+
+def test_known_country_ignores_the_events(bundled):
+    assert bundled.center("AFG", SINGAPORE) == bundled.center("AFG")
+
+
+def test_region_with_a_country_without_geometry_covers_its_events(bundled):
+    minx, miny, maxx, maxy = bundled.region_bounds(("MYS", "SGP"), SINGAPORE)
+    assert (minx, miny, maxx, maxy) == bundled.region_bounds(("MYS",))
+    lat, lon = bundled.region_center(("MYS", "SGP"), SINGAPORE)
+    assert miny < lat < maxy and minx < lon < maxx
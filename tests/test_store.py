@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from acled.store import EventStore, lag_cutoff  # noqa: E402
+
+DAY = 24 * 3600
+ISO = 231
+
+
+def events(*dates):
+    return pd.DataFrame({'event_date': list(dates), 'fatalities': [0] * len(dates)})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EventStore(path=str(tmp_path / "events.sqlite"))
+
+
+def test_settled_month_stays_cached(store):
+    store.write(ISO, ["2024-03"], events("2024-03-02"))
+    now = time.time()
+    for days in (0, 8, 200):
+        assert store.plan(ISO, "2024-03-01", "2024-03-31", now=now + days * DAY) == (["2024-03"], [], [])
+
+
+def test_month_at_the_cutoff_is_refetched_once_the_cutoff_moves(store):
+    store.write(ISO, ["2025-10"], events("2025-10-02"), covered_to="2025-10-18")
+    now = time.time()
+    # A query that stops at the covered day is answered from the store...
+    assert store.plan(ISO, "2025-10-01", "2025-10-18", now=now) == (["2025-10"], [], [])
+    # ... any later end date that the access lag allows is not.
+    for days in (8, 30, 200):
+        later = now + days * DAY
+        end_date = min("2025-10-31", lag_cutoff(later))
+        assert store.plan(ISO, "2025-10-01", end_date, now=later) == ([], [], ["2025-10"])
+
+
+def test_query_past_the_cutoff_does_not_refetch_what_is_not_published(store):
+    now = time.time()
+    cutoff = lag_cutoff(now)
+    month = cutoff[:7]
+    store.write(ISO, [month], events(cutoff))
+    # Default coverage is the cutoff in force at write time.
+    assert store.plan(ISO, f"{month}-01", f"{month}-28", now=now) == ([month], [], [])
+
+
+def test_partial_month_becomes_complete_after_refetch(store):
+    store.write(ISO, ["2025-10"], events("2025-10-02"), covered_to="2025-10-18")
+    store.write(ISO, ["2025-10"], events("2025-10-02", "2025-10-25"), covered_to="2025-12-01")
+    later = time.time() + 400 * DAY
+    assert store.plan(ISO, "2025-10-01", "2025-10-31", now=later) == (["2025-10"], [], [])
+    assert len(store.read(ISO, "2025-10-01", "2025-10-31")) == 2
+
+
+def test_store_without_coverage_column_infers_it_from_fetch_time(tmp_path):
+    path = str(tmp_path / "events.sqlite")
+    con = sqlite3.connect(path)
+    con.execute(
+        "CREATE TABLE partitions (iso INTEGER, part_month TEXT, fetched_at REAL, last_used REAL,"
+        " n_rows INTEGER, n_bytes INTEGER, PRIMARY KEY (iso, part_month))"
+    )
+    fetched_at = time.time()
+    month = lag_cutoff(fetched_at)[:7]
+    con.execute("INSERT INTO partitions VALUES (?, ?, ?, ?, 0, 0)", (ISO, month, fetched_at, fetched_at))
+    con.commit()
+    con.close()
+
+    store = EventStore(path=path)
+    later = fetched_at + 40 * DAY
+    end_date = min(pd.Period(month, freq="M").end_time.strftime("%Y-%m-%d"), lag_cutoff(later))
+    assert store.plan(ISO, f"{month}-01", end_date, now=later) == ([], [], [month])
+
+
+def test_connections_are_closed(store, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        con = connect(*args, **kwargs)
+        opened.append(con)
+        return con
+
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+    store.write(ISO, ["2024-03"], events("2024-03-02"))
+    store.plan(ISO, "2024-03-01", "2024-03-31")
+    store.read(ISO, "2024-03-01", "2024-03-31")
+    store.evict()
+    assert opened
+    for con in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            con.execute("SELECT 1")